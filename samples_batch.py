@@ -0,0 +1,248 @@
+import argparse
+import collections
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import samples_engine
+import samples_metrics
+from samples_cache import OutputCache, DEFAULT_CACHE_DIR
+
+# Batch rendering of many designs over a process pool.
+# Each job renders every requested brand/variant of one design, so a design is decoded
+# and enhanced once inside its worker and the designs are spread across the cores.
+
+logger = logging.getLogger("samples.batch")
+
+# Image types picked up when scanning a directory
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+def load_jobs(source):
+    """
+    Build the job list from a directory of images or from a CSV/JSON manifest.
+    A CSV manifest has an "image" column and optional "design_name" and "save_profile" columns.
+    A JSON manifest is a list of image paths or of {"image": ..., "design_name": ..., "save_profile": ...} objects.
+    Relative image paths in a manifest are resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        return [{"image": os.path.join(source, name), "design_name": None, "save_profile": None}
+                for name in sorted(os.listdir(source))
+                if name.lower().endswith(IMAGE_EXTENSIONS)]
+
+    manifest_dir = os.path.dirname(os.path.abspath(source))
+    if source.lower().endswith(".json"):
+        with open(source, encoding="utf-8") as manifest:
+            entries = json.load(manifest)
+        entries = [{"image": entry} if isinstance(entry, str) else entry for entry in entries]
+    elif source.lower().endswith(".csv"):
+        with open(source, newline="", encoding="utf-8") as manifest:
+            entries = list(csv.DictReader(manifest))
+    else:
+        raise ValueError(f"Unsupported batch source '{source}', expected a directory, .csv or .json manifest")
+
+    return [{"image": os.path.join(manifest_dir, entry["image"]),
+             "design_name": entry.get("design_name") or None,
+             "save_profile": entry.get("save_profile") or None}
+            for entry in entries]
+
+def expected_outputs(brands, heights, substrates, bleed_mm_values, render_options=None):
+    """
+    Number of PDFs a job writes: one combined PDF, or one per variant.
+    """
+    if (render_options or {}).get("combined"):
+        return 1
+    return len(brands) * len(heights) * len(substrates) * len(bleed_mm_values)
+
+def failed_result(job, expected, error):
+    """
+    Result of a job that did not return one, such as a job whose worker process died.
+    """
+    return {"image": job["image"], "design_name": job["design_name"], "outputs": [], "expected": expected,
+            "status": "failed", "error": error, "seconds": 0.0}
+
+def render_job(job, brands, heights, substrates, bleed_mm_values, output_dir, render_options=None):
+    """
+    Render all variants of one design. Runs inside a worker process.
+    render_options are passed on to samples_engine.create_variants (encoding, streaming, ...);
+    the job's save_profile, if set, overrides the save_profile option.
+    Returns a result dict with the written outputs, the status and the elapsed time.
+    """
+    start = time.perf_counter()
+    expected = expected_outputs(brands, heights, substrates, bleed_mm_values, render_options)
+    result = {"image": job["image"], "design_name": job["design_name"], "outputs": [],
+              "expected": expected, "status": "failed", "error": None}
+    options = dict(render_options or {})
+    if job.get("save_profile"):
+        options["save_profile"] = job["save_profile"]
+    try:
+        if not os.path.exists(job["image"]):
+            raise FileNotFoundError(f"The specified image file '{job['image']}' does not exist.")
+        result["outputs"] = samples_engine.create_variants(
+            job["image"], heights, substrates, bleed_mm_values, design_name=job["design_name"],
+            brands=brands, output_dir=output_dir, **options)
+        if len(result["outputs"]) == expected:
+            result["status"] = "ok"
+        else:
+            result["error"] = f"{expected - len(result['outputs'])} of {expected} outputs were not written"
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def run_batch(jobs, brands=None, heights=None, substrates=None, bleed_mm_values=None,
+              output_dir=".", workers=None, max_in_flight=None, **render_options):
+    """
+    Render the jobs on a process pool and yield one result per job as it completes.
+    Extra keyword arguments are passed on to samples_engine.create_variants.
+    At most max_in_flight jobs (default: twice the worker count) are submitted at a time,
+    so a large batch does not queue every job up front.
+    A job that raises is yielded as a failed result. A worker process that dies (killed for
+    memory, crashed in MuPDF) breaks the whole pool: the pool is restarted and the jobs that
+    were in flight on it are run again one at a time, so only the job that kills its worker
+    on its own is yielded as failed.
+    Raises ValueError before any job is submitted if the panels would be streamed with an
+    encoding profile that cannot be streamed.
+    """
+    samples_engine.check_stream_encoding(render_options.get("encoding", "production"),
+                                         render_options.get("tier", "proof"), render_options.get("streaming"))
+    brands = brands or list(samples_engine.BRANDS)
+    heights = heights or samples_engine.HEIGHTS
+    substrates = substrates or samples_engine.SUBSTRATES
+    bleed_mm_values = bleed_mm_values or samples_engine.BLEED_MM_VALUES
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    expected = expected_outputs(brands, heights, substrates, bleed_mm_values, render_options)
+
+    def submit(job):
+        in_flight[executor.submit(render_job, job, brands, heights, substrates,
+                                  bleed_mm_values, output_dir, render_options)] = job
+
+    pending = iter(jobs)
+    # Jobs in flight when a worker died, run again one at a time
+    suspects = collections.deque()
+    # Job of every submitted future
+    in_flight = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            if suspects:
+                if not in_flight:
+                    submit(suspects.popleft())
+            else:
+                # Top up the pool to the in-flight bound
+                for job in pending:
+                    submit(job)
+                    if len(in_flight) >= max_in_flight:
+                        break
+            if not in_flight:
+                break
+
+            # A job alone on the pool is the one to blame if its worker dies
+            alone = len(in_flight) == 1
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = any(isinstance(future.exception(), BrokenProcessPool) for future in done)
+            if broken:
+                # Every job in flight ran on the broken pool and is finished with it
+                done, _ = wait(in_flight)
+            for future in done:
+                job = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    if not alone:
+                        suspects.append(job)
+                        continue
+                    result = failed_result(job, expected, f"Worker process died: {e}")
+                except Exception as e:
+                    result = failed_result(job, expected, str(e))
+                yield result
+
+            if broken:
+                logger.error("A worker process died, restarting the pool")
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render sample panels for a directory or manifest of designs.")
+    parser.add_argument("source", help="Directory of images, or a .csv/.json manifest")
+    parser.add_argument("--brands", nargs="+", choices=sorted(samples_engine.BRANDS),
+                        help="Brands to render (default: all)")
+    parser.add_argument("--output-dir", default=".", help="Directory the PDFs are written to")
+    parser.add_argument("--encoding", default="production", choices=sorted(samples_engine.ENCODING_PROFILES),
+                        help="Encoding profile of the panel image (default: production)")
+    parser.add_argument("--tier", default="proof", choices=list(samples_engine.RESOLUTION_TIERS),
+                        help="Resolution tier of the panel image (default: proof)")
+    parser.add_argument("--streaming", action="store_true", default=None,
+                        help="Render panels in bands, with memory bounded by the band size (default: per tier)")
+    parser.add_argument("--band-rows", type=int, default=512, help="Output rows per band in streaming mode")
+    parser.add_argument("--save-profile", choices=list(samples_engine.SAVE_PROFILES),
+                        help="Save profile of the PDFs (default: per brand, or delivery)")
+    parser.add_argument("--combined", action="store_true",
+                        help="Write all variants of a design as the pages of one PDF")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Threads per worker for the band-parallel enhance and resize of a design (default: 1)")
+    parser.add_argument("--max-in-flight", type=int, help="Maximum number of submitted jobs (default: 2x workers)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse unchanged outputs from the content-addressed output cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Output cache directory")
+    parser.add_argument("--cache-size-gb", type=float, default=20, help="Size cap of the output cache in GB")
+    parser.add_argument("--report", help="Write the per-job results to this JSON file")
+    parser.add_argument("--metrics", help="Append per-variant stage timings to this file as JSON lines")
+    parser.add_argument("--verbose", action="store_true", help="Log every panel and output as it is written")
+    args = parser.parse_args(argv)
+    try:
+        samples_engine.check_stream_encoding(args.encoding, args.tier, args.streaming)
+    except ValueError as e:
+        parser.error(f"--tier {args.tier}{' --streaming' if args.streaming else ''}: {e}")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Engine progress is per output, only shown with --verbose
+    logging.getLogger("samples").setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    if args.metrics:
+        # Workers inherit the hook when forked and install it from the environment when spawned
+        os.environ["SAMPLES_METRICS"] = os.path.abspath(args.metrics)
+        samples_metrics.add_hook(samples_metrics.JsonLinesWriter(os.environ["SAMPLES_METRICS"]))
+
+    # Every worker stores into the cache through its own copy of it
+    cache = OutputCache(args.cache_dir, int(args.cache_size_gb * 1024 ** 3),
+                        writers=args.workers or os.cpu_count() or 1) if args.cache else None
+
+    jobs = load_jobs(args.source)
+    logger.info("Rendering %s design(s)", len(jobs))
+
+    results = []
+    try:
+        for result in run_batch(jobs, brands=args.brands, output_dir=args.output_dir,
+                                workers=args.workers, max_in_flight=args.max_in_flight,
+                                encoding=args.encoding, tier=args.tier, streaming=args.streaming,
+                                band_rows=args.band_rows, cache=cache, save_profile=args.save_profile,
+                                combined=args.combined, threads=args.threads):
+            results.append(result)
+            outputs = f"{len(result['outputs'])}/{result['expected']}"
+            if result["status"] == "ok":
+                logger.info("%s: %s PDFs in %ss", result["image"], outputs, result["seconds"])
+            else:
+                logger.error("%s: %s PDFs, %s", result["image"], outputs, result["error"])
+    finally:
+        # Report the finished jobs also when the batch is interrupted
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as report:
+                json.dump(results, report, indent=2)
+
+    failed = sum(1 for result in results if result["status"] != "ok")
+    logger.info("Done: %s succeeded, %s failed", len(results) - failed, failed)
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,319 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import fitz
+import PIL
+import reportlab
+from PIL import Image, ImageDraw
+
+import samples_engine
+import samples_metrics
+
+# Per-stage benchmark of the render pipeline.
+# The source images and the footer PDF are generated locally, so the benchmark runs on
+# any machine without the brand footers or real designs, and the results are written as
+# JSON so two versions of the code can be compared stage by stage.
+
+# Source image sizes (width, height) rendered by default
+DEFAULT_SIZES = [(1000, 1200), (3000, 3600), (6000, 7200)]
+
+# Brand profile registered for the synthetic footer, with the text offsets of BENCH_LAYOUT
+BENCH_BRAND = "bench"
+BENCH_LAYOUT = "anthem"
+
+# Pipeline stages in render order, as reported per variant, with one save stage per save profile
+STAGES = (["resize", "encode", "canvas_write", "footer", "overlay_footer", "subset_fonts"]
+          + [f"save_{save_profile}" for save_profile in samples_engine.SAVE_PROFILES])
+
+# Stages of a streamed variant: the master is resized and compressed in one pass, and the
+# footer is appended to a copy of the base panel as an incremental update
+STREAMED_STAGES = ["stream_panel", "canvas_write", "footer", "overlay_footer", "subset_fonts", "save_incremental"]
+
+def synthetic_image(path, size):
+    """
+    Write a deterministic RGB test design of the given size to path: a fractal channel for
+    fine detail and two gradients, so it compresses like artwork rather than like noise.
+    """
+    width, height = size
+    detail = Image.effect_mandelbrot(size, (-2.2, -1.3, 0.8, 1.3), 96)
+    horizontal = Image.linear_gradient("L").rotate(90).resize(size)
+    radial = Image.radial_gradient("L").resize(size)
+    img = Image.merge("RGB", (detail, horizontal, radial))
+
+    # Hard edges, like the shapes of a printed pattern
+    draw = ImageDraw.Draw(img)
+    step = max(width, height) // 12
+    for offset in range(0, width + height, step):
+        draw.line([(offset, 0), (offset - height, height)], fill=(240, 200, 40), width=max(1, step // 20))
+    img.save(path)
+    return path
+
+def synthetic_footer(path, width=1580.64, height=94.8):
+    """
+    Write a stand-in brand footer PDF to path, with the page size of the brand footers:
+    a raster logo, a rule and the field labels the design, material and height are set next to.
+    """
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+
+    logo = Image.linear_gradient("L").resize((400, 100)).convert("RGB")
+    logo_bytes = io.BytesIO()
+    logo.save(logo_bytes, "PNG")
+    page.insert_image(fitz.Rect(20, 10, 260, 70), stream=logo_bytes.getvalue())
+
+    page.draw_line((0, 2), (width, 2), color=(0, 0, 0), width=1)
+    for y, label in ((45, "Design:"), (63, "Material:"), (53, "Panel Height:")):
+        x = width - 480 if label != "Panel Height:" else width - 230
+        page.insert_text((x, y), label, fontname="helv", fontsize=10)
+
+    doc.save(path)
+    doc.close()
+    return path
+
+def register_bench_brand(footer_path, brand=BENCH_BRAND, layout=BENCH_LAYOUT):
+    """
+    Add a BRANDS profile that uses the synthetic footer with the text layout of an existing brand.
+    """
+    samples_engine.BRANDS[brand] = dict(samples_engine.BRANDS[layout], name="Benchmark",
+                                        footer_dir=os.path.dirname(footer_path),
+                                        footer_file=os.path.basename(footer_path))
+    return brand
+
+def timed(function, *args, **kwargs):
+    """
+    Call function and return (result, elapsed seconds).
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def bench_variant(enhanced_img, height_ft, bleed_mm, dpi, encoding, output_path, brand=BENCH_BRAND, width_ft=2,
+                  streaming=False, band_rows=512):
+    """
+    Render one variant stage by stage with the engine's building blocks.
+    In memory the master is resized, encoded and written into the base panel, and the stamped
+    panel is saved once with every save profile, from a freshly opened base. Streamed, the
+    master is resampled and compressed band by band with stream_master, as at the production
+    tier, and the footer is appended to a copy of the base panel as an incremental update.
+    The footer stages are timed on their first pass, which optimizes the footer if it is not
+    cached yet.
+    Returns the per-stage seconds and the size of the PDF written with each save profile.
+    """
+    profile = samples_engine.BRANDS[brand]
+    stages = {}
+
+    if streaming:
+        timer = samples_metrics.StageTimer()
+        master = samples_engine.stream_master(enhanced_img, width_ft=width_ft, dpi=dpi, encoding=encoding,
+                                              band_rows=band_rows, temp_dir=os.path.dirname(output_path),
+                                              timer=timer)
+        stages["stream_panel"] = timer.stages["stream_panel"]["wall"]
+        base_pdf = f"{output_path}.base"
+        try:
+            _, stages["canvas_write"] = timed(samples_engine.write_streamed_panel, base_pdf,
+                                              [(height_ft, bleed_mm)], master, width_ft=width_ft, dpi=dpi)
+        finally:
+            os.remove(master[1])
+        save_profiles = ["incremental"]
+    else:
+        size = samples_engine.tile_pixel_size(enhanced_img.size, width_ft, samples_engine.MASTER_BLEED_MM, dpi)
+        img, stages["resize"] = timed(enhanced_img.resize, size, Image.Resampling.LANCZOS)
+        (pdf_filter, stream), stages["encode"] = timed(samples_engine.encode_panel_image, img, encoding)
+        base_pdf, stages["canvas_write"] = timed(samples_engine.write_panel_pdf, img.size, pdf_filter, stream,
+                                                 height_ft, width_ft=width_ft, dpi=dpi, bleed_mm=bleed_mm)
+        save_profiles = list(samples_engine.SAVE_PROFILES)
+
+    output_bytes = {}
+    try:
+        for save_profile in save_profiles:
+            if streaming:
+                shutil.copyfile(base_pdf, output_path)
+                doc = fitz.open(output_path)
+            else:
+                doc = fitz.open(stream=base_pdf, filetype="pdf")
+            footer_pdf, seconds = timed(samples_engine.get_optimized_footer,
+                                        os.path.join(profile["footer_dir"], profile["footer_file"]),
+                                        doc[0].rect.width, dpi)
+            stages.setdefault("footer", seconds)
+            _, seconds = timed(samples_engine.stamp_footer, doc[0], footer_pdf, profile, "bench", "TRAD", height_ft)
+            stages.setdefault("overlay_footer", seconds)
+            _, seconds = timed(doc.subset_fonts)
+            stages.setdefault("subset_fonts", seconds)
+            _, stages[f"save_{save_profile}"] = timed(samples_engine.save_panel, doc, output_path,
+                                                      incremental=streaming, profile=save_profile)
+            doc.close()
+            output_bytes[save_profile] = os.path.getsize(output_path)
+    finally:
+        if streaming:
+            os.remove(base_pdf)
+
+    return stages, output_bytes
+
+def run_bench(sizes=None, heights=None, bleed_mm_values=None, dpi=72, encoding="production", repeats=3, work_dir=None,
+              streaming=False, band_rows=512):
+    """
+    Benchmark every (source size, height, bleed) combination on synthetic inputs.
+    Each stage is run repeats times and its median is reported, in seconds.
+    The optimized footers are cached in the temporary work directory, which is emptied
+    before each run, so the footer stage includes the optimization of the footer for the
+    panel width, as on the first variant of that width.
+    With streaming, the variants are rendered the streamed way, see bench_variant.
+    Returns the results as a JSON-serializable dict.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    heights = heights or samples_engine.HEIGHTS
+    bleed_mm_values = bleed_mm_values or samples_engine.BLEED_MM_VALUES
+    stage_names = STREAMED_STAGES if streaming else STAGES
+
+    footer_cache_dir = samples_engine.FOOTER_CACHE_DIR
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        samples_engine.FOOTER_CACHE_DIR = os.path.join(temp_dir, "footers")
+        try:
+            register_bench_brand(synthetic_footer(os.path.join(temp_dir, "footer.pdf")))
+
+            results = []
+            for size in sizes:
+                image_path = synthetic_image(os.path.join(temp_dir, f"design_{size[0]}x{size[1]}.png"), size)
+                enhance_runs = []
+                for _ in range(repeats):
+                    enhanced_img, seconds = timed(samples_engine.enhance_image, image_path,
+                                                  target_width=samples_engine.master_width(dpi=dpi))
+                    enhance_runs.append(seconds)
+
+                entry = {"image": f"{size[0]}x{size[1]}", "enhance": round(statistics.median(enhance_runs), 4),
+                         "variants": []}
+                for height_ft in heights:
+                    for bleed_mm in bleed_mm_values:
+                        runs = {stage: [] for stage in stage_names}
+                        output_path = os.path.join(temp_dir, f"bench_{height_ft}ft_{bleed_mm}mm.pdf")
+                        for _ in range(repeats):
+                            # Every run optimizes the footer, like the first variant of a panel width
+                            samples_engine.close_footers()
+                            shutil.rmtree(samples_engine.FOOTER_CACHE_DIR, ignore_errors=True)
+                            stages, output_bytes = bench_variant(enhanced_img, height_ft, bleed_mm, dpi, encoding,
+                                                                 output_path, streaming=streaming,
+                                                                 band_rows=band_rows)
+                            for stage, seconds in stages.items():
+                                runs[stage].append(seconds)
+                        entry["variants"].append({
+                            "height_ft": height_ft,
+                            "bleed_mm": bleed_mm,
+                            "stages": {stage: round(statistics.median(runs[stage]), 4) for stage in stage_names},
+                            "output_bytes": output_bytes,
+                        })
+                results.append(entry)
+
+        finally:
+            # Leave the engine as it was, the bench brand and its footers live in temp_dir
+            samples_engine.close_footers()
+            samples_engine.BRANDS.pop(BENCH_BRAND, None)
+            samples_engine.FOOTER_CACHE_DIR = footer_cache_dir
+
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pillow": PIL.__version__,
+        "pymupdf": fitz.VersionBind,
+        "reportlab": reportlab.Version,
+        "dpi": dpi,
+        "encoding": encoding,
+        "streaming": streaming,
+        "repeats": repeats,
+        "results": results,
+    }
+
+def git_revision():
+    """
+    Commit the benchmark ran on, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+def flatten(report):
+    """
+    Map (image, height, bleed, stage) to seconds, with the enhance time under a None height and bleed.
+    """
+    timings = {}
+    for entry in report["results"]:
+        timings[(entry["image"], None, None, "enhance")] = entry["enhance"]
+        for variant in entry["variants"]:
+            for stage, seconds in variant["stages"].items():
+                timings[(entry["image"], variant["height_ft"], variant["bleed_mm"], stage)] = seconds
+    return timings
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compare two benchmark reports and return the (key, baseline, current) timings that got
+    slower by more than threshold (a fraction of the baseline time).
+    """
+    before, after = flatten(baseline), flatten(current)
+    return [(key, before[key], after[key]) for key in after
+            if key in before and after[key] > before[key] * (1 + threshold)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the render pipeline on synthetic inputs.")
+    parser.add_argument("--sizes", nargs="+", help="Source image sizes as WIDTHxHEIGHT (default: 1000x1200 3000x3600 6000x7200)")
+    parser.add_argument("--heights", nargs="+", type=int, help="Panel heights in ft (default: all)")
+    parser.add_argument("--bleeds", nargs="+", type=int, help="Bleeds in mm (default: all)")
+    parser.add_argument("--tier", default="proof", choices=list(samples_engine.RESOLUTION_TIERS),
+                        help="Resolution tier of the panel image (default: proof)")
+    parser.add_argument("--dpi", type=int, help="Panel image resolution, overrides the tier")
+    parser.add_argument("--streaming", action="store_true", default=None,
+                        help="Stream the panels in bands, as the engine does (default: per tier)")
+    parser.add_argument("--band-rows", type=int, default=512, help="Output rows per band in streaming mode")
+    parser.add_argument("--encoding", default="production", choices=sorted(samples_engine.ENCODING_PROFILES),
+                        help="Encoding profile of the panel image (default: production)")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per stage, the median is reported")
+    parser.add_argument("--output", default="bench.json", help="JSON file the results are written to")
+    parser.add_argument("--compare", help="Earlier results to compare against, stages that got slower are listed")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown reported by --compare (default: 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+    try:
+        samples_engine.check_stream_encoding(args.encoding, args.tier, args.streaming)
+    except ValueError as e:
+        parser.error(f"--tier {args.tier}{' --streaming' if args.streaming else ''}: {e}")
+
+    sizes = [tuple(int(value) for value in size.lower().split("x")) for size in args.sizes] if args.sizes else None
+    dpi = args.dpi or samples_engine.RESOLUTION_TIERS[args.tier]["dpi"]
+    streaming = args.streaming or samples_engine.RESOLUTION_TIERS[args.tier]["streaming"]
+
+    report = run_bench(sizes=sizes, heights=args.heights, bleed_mm_values=args.bleeds, dpi=dpi,
+                       encoding=args.encoding, repeats=args.repeats, streaming=streaming, band_rows=args.band_rows)
+
+    for entry in report["results"]:
+        print(f"{entry['image']}: enhance {entry['enhance']:.3f}s")
+        for variant in entry["variants"]:
+            stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in variant["stages"].items())
+            sizes = ", ".join(f"{save_profile} {size / 1024 ** 2:.2f} MB"
+                              for save_profile, size in variant["output_bytes"].items())
+            print(f"    {variant['height_ft']}ft {variant['bleed_mm']}mm: {stages} ({sizes})")
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        slower = compare(baseline, report, args.threshold)
+        for (image, height_ft, bleed_mm, stage), before, after in slower:
+            variant = f" {height_ft}ft {bleed_mm}mm" if height_ft is not None else ""
+            print(f"[⚠️] {image}{variant} {stage}: {before:.3f}s -> {after:.3f}s")
+        print(f"{len(slower)} stage timing(s) slower than {args.compare} by more than {args.threshold:.0%}")
+        return 1 if slower else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import random
+import shutil
+import tempfile
+
+# Content-addressed cache of rendered variant PDFs.
+# A variant is identified by the hash of everything that goes into it: the source image
+# bytes, the brand footer file, the font and the render parameters. Re-running a collection
+# then only renders the designs whose inputs changed.
+
+# Bump when a code change alters the rendered output, so older cache entries stop matching
+CACHE_VERSION = 5
+
+DEFAULT_CACHE_DIR = os.environ.get("SAMPLES_CACHE_DIR",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "samples_pdfs"))
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+class OutputCache:
+    """
+    On-disk cache of final PDFs keyed by variant_key, capped at max_bytes.
+    Entries are evicted least recently used first; a hit refreshes the entry's mtime.
+    Outputs are hard-linked out of the cache where possible and copied otherwise.
+    writers is the number of processes storing into the cache directory at the same time.
+    Each walk of the cache gives the writer a share of the free space, and a writer only walks
+    the cache again once it has stored its share, so together the writers stay within
+    max_bytes, give or take an entry each, without walking the cache on every store.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, writers=1):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.writers = max(1, writers)
+        self._digests = {}
+        # Bytes stored since the last walk, and this writer's share of the free space it found
+        self._stored_bytes = 0
+        self._share_bytes = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def file_digest(self, path):
+        """
+        SHA-256 of a file's bytes, memoized per (path, size, mtime) for the life of the cache object.
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._digests:
+            digest = hashlib.sha256()
+            with open(path, "rb") as source:
+                for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self._digests[memo_key] = digest.hexdigest()
+        return self._digests[memo_key]
+
+    def variant_key(self, image_digest, footer_path, font_path, params):
+        """
+        Cache key of one variant: the source image digest, the footer and font file digests
+        and the JSON-encoded render parameters.
+        """
+        key = hashlib.sha256()
+        key.update(f"v{CACHE_VERSION}\0{image_digest}\0".encode())
+        key.update(self.file_digest(footer_path).encode())
+        key.update(b"\0")
+        key.update((self.file_digest(font_path) if font_path and os.path.exists(font_path) else "").encode())
+        key.update(b"\0")
+        key.update(json.dumps(params, sort_keys=True).encode())
+        return key.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".pdf")
+
+    def fetch(self, key, output_path):
+        """
+        Place the cached PDF for key at output_path.
+        Returns True on a hit, False if the key is not cached.
+        """
+        entry = self._entry_path(key)
+        try:
+            # Mark the entry as recently used
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(entry, output_path)
+        except OSError:
+            shutil.copyfile(entry, output_path)
+        return True
+
+    def store(self, key, pdf_path):
+        """
+        Add a rendered PDF to the cache under key and evict old entries beyond the size cap.
+        """
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        size = os.path.getsize(pdf_path)
+        try:
+            replaced = os.path.getsize(entry)
+        except FileNotFoundError:
+            replaced = 0
+
+        # Stage next to the entry and rename, so concurrent workers never see a partial file
+        fd, staged = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".tmp")
+        os.close(fd)
+        try:
+            os.remove(staged)
+            try:
+                os.link(pdf_path, staged)
+            except OSError:
+                shutil.copyfile(pdf_path, staged)
+            os.replace(staged, entry)
+        except Exception:
+            if os.path.exists(staged):
+                os.remove(staged)
+            raise
+
+        self._stored_bytes += size - replaced
+        if self._share_bytes is None or self._stored_bytes >= self._share_bytes:
+            self.evict()
+
+    def _entries(self):
+        """
+        (mtime, size, path) of every cached entry.
+        """
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes, and share
+        out the free space left among the writers.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        # Half of an equal share, the other writers may still be storing shares of an earlier walk
+        self._stored_bytes = 0
+        self._share_bytes = (self.max_bytes - total) // (2 * self.writers)
+
+def cache_bytes(cache_dir):
+    """
+    Total size of the cached entries in cache_dir.
+    """
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(cache_dir) for name in files if name.endswith(".pdf"))
+
+def check_writers(writers=4, max_bytes=10000, stores=300, seed=0):
+    """
+    Store random-sized entries through writers pickled copies of one OutputCache, the way
+    the batch workers receive it, in a random order.
+    Returns (peak, allowed): the largest size the cache directory reached and the most it may
+    hold, max_bytes plus one entry per writer, which a writer may store past its share before
+    it walks the cache.
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = OutputCache(os.path.join(temp_dir, "cache"), max_bytes, writers=writers)
+        copies = [pickle.loads(pickle.dumps(cache)) for _ in range(writers)]
+        largest = peak = 0
+        for i in range(stores):
+            pdf_path = os.path.join(temp_dir, f"{i}.pdf")
+            size = rng.randint(max_bytes // 100, max_bytes // 20)
+            with open(pdf_path, "wb") as pdf:
+                pdf.write(bytes(size))
+            rng.choice(copies).store(f"{i:064x}", pdf_path)
+            largest = max(largest, size)
+            peak = max(peak, cache_bytes(cache.cache_dir))
+    return peak, max_bytes + writers * largest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that writers sharing an output cache stay within its size cap.")
+    parser.add_argument("--writers", type=int, default=4, help="Number of cache copies storing entries (default: 4)")
+    parser.add_argument("--max-bytes", type=int, default=10000, help="Size cap of the cache (default: 10000)")
+    parser.add_argument("--stores", type=int, default=300, help="Number of entries stored (default: 300)")
+    args = parser.parse_args(argv)
+
+    peak, allowed = check_writers(args.writers, args.max_bytes, args.stores)
+    print(f"{args.writers} writers, cap {args.max_bytes} bytes: peak {peak} bytes, allowed {allowed}")
+    return 1 if peak > allowed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
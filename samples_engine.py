@@ -0,0 +1,1473 @@
+import argparse
+import collections
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageEnhance, ImageFilter
+
+import samples_metrics
+
+# Shared rendering engine for the Anthem, Lemon Park and Painted Paper sample panels.
+# The brand scripts only differ by their footer file, font size and text offsets,
+# which are described by the brand profiles below.
+# PyMuPDF and reportlab are imported by the functions that use them, so the command line
+# and the tools that only need the panel geometry start without loading them.
+
+logger = logging.getLogger("samples")
+
+# Repository root, the brand footers and the font live next to this file
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Path to the font file - shipped in the Painted Paper directory
+FONT_PATH = os.path.join(BASE_DIR, "Painted Paper", "Acumin-RPro.otf")
+
+# Footer text font, loaded once per process by get_font
+_FONT = None
+
+def get_font():
+    """
+    Return the footer text font as a fitz.Font, loaded on first use and shared by every
+    output of the process, so the font file is parsed and its glyph metrics are cached once.
+    Falls back to the built-in Helvetica if Acumin Pro cannot be loaded.
+    """
+    import fitz
+
+    global _FONT
+    if _FONT is None:
+        # Try to load Acumin Pro font if available
+        try:
+            _FONT = fitz.Font(fontfile=FONT_PATH)
+        except Exception:
+            logger.warning("Acumin Pro font not found. Using Helvetica as fallback.")
+            _FONT = fitz.Font("helv")  # Fallback to a standard font
+    return _FONT
+
+# Define horizontal extension in points (convert from pixels to points)
+# Bleed values: 2mm = 5.6693 points, 3mm = 8.5039 points
+BLEED_2MM_POINTS = 5.6693
+BLEED_3MM_POINTS = 8.5039
+
+# Brand profiles
+# - footer_dir / footer_file: footer PDF stamped at the bottom of every panel
+# - font_size: size of the footer text
+# - design_x / height_x: distance of the text columns from the right edge of the page
+# - design_y / material_y / height_y: baseline of each text line below the top of the footer
+# - save_profile (optional): SAVE_PROFILES entry of the brand's outputs, DEFAULT_SAVE_PROFILE otherwise
+BRANDS = {
+    "anthem": {
+        "name": "Anthem",
+        "footer_dir": os.path.join(BASE_DIR, "Anthem"),
+        "footer_file": "ATfooter.pdf",
+        "font_size": 12,
+        "design_x": 430,
+        "height_x": 155,
+        "design_y": 45,
+        "material_y": 63,
+        "height_y": 53,
+    },
+    "lemon-park": {
+        "name": "Lemon Park",
+        "footer_dir": os.path.join(BASE_DIR, "Lemon Park"),
+        "footer_file": "LPfooter.pdf",
+        "font_size": 12,
+        "design_x": 430,
+        "height_x": 155,
+        "design_y": 49,
+        "material_y": 65,
+        "height_y": 55,
+    },
+    "painted-paper": {
+        "name": "Painted Paper",
+        "footer_dir": os.path.join(BASE_DIR, "Painted Paper"),
+        "footer_file": "PPfooter1.pdf",
+        "font_size": 11.5,
+        "design_x": 390,
+        "height_x": 142,
+        "design_y": 45,
+        "material_y": 60,
+        "height_y": 51,
+    },
+}
+
+# Full material name for each substrate code
+MATERIAL_NAMES = {
+    "TRAD": "Traditional",
+    "P&S": "Peel & Stick",
+    "PP": "Pre-Pasted"
+}
+
+# Encoding profiles for the panel image embedded in the base PDF
+# The image is encoded once with the chosen profile and the encoded bytes are written
+# as the PDF image stream as they are, without any further recompression.
+# - JPEG: DCTDecode stream at the given quality (lossy, fastest to encode and smallest)
+# - Flate: FlateDecode stream of the raw RGB data at the given zlib level (lossless)
+ENCODING_PROFILES = {
+    "proof": {"format": "JPEG", "quality": 80},
+    "lossless-fast": {"format": "Flate", "level": 1},
+    "production": {"format": "Flate", "level": 6},
+    "archival": {"format": "Flate", "level": 9},
+}
+
+# Resolution tiers, the effective resolution of the embedded panel image
+# - proof: screen resolution for sales proofs, renders in seconds
+# - standard: 300 ppi print resolution, still rendered in memory
+# - production: the full 1200 ppi print resolution, streamed in bands to bound memory
+RESOLUTION_TIERS = {
+    "proof": {"dpi": 72, "streaming": False},
+    "standard": {"dpi": 300, "streaming": False},
+    "production": {"dpi": 1200, "streaming": True},
+}
+
+# Save profiles of the final PDFs, keyword arguments of fitz.Document.save
+# - fast: only unused objects are dropped, no cleaning or linearization, for the RIP workflow
+# - delivery: full garbage collection, cleaned and linearized content for customer delivery
+SAVE_PROFILES = {
+    "fast": {"garbage": 1, "deflate": True, "clean": False, "linear": False},
+    "delivery": {"garbage": 4, "deflate": True, "clean": True, "linear": True},
+}
+
+# Save profile used when neither the job nor the brand profile selects one
+DEFAULT_SAVE_PROFILE = "delivery"
+
+# Default enhancement factors applied by enhance_image
+DEFAULT_ENHANCEMENT = {"contrast": 1.2, "brightness": 1.1, "sharpness": 1.3}
+
+# An oversized source is pre-shrunk to no less than this many times the master width before the
+# final LANCZOS resample, the same margin Image.thumbnail keeps
+REDUCING_GAP = 2
+
+# Default variant set: (2 lengths x 3 substrates) x 2 bleeds = 12 pdfs per brand, but no double blade
+SUBSTRATES = ["TRAD", "P&S", "PP"]
+HEIGHTS = [13, 27]
+BLEED_MM_VALUES = [2, 3]
+# Bleed the master tile image is rendered for, smaller bleeds crop it (see tile_placement)
+MASTER_BLEED_MM = max(BLEED_MM_VALUES)
+
+# Footer documents opened once per process, keyed by footer path
+_FOOTER_CACHE = {}
+
+# Optimized footers (see get_optimized_footer) are kept on disk, shared by every process and run
+FOOTER_CACHE_DIR = os.environ.get("SAMPLES_FOOTER_CACHE_DIR",
+                                  os.path.join(os.path.expanduser("~"), ".cache", "samples_footers"))
+
+# SHA-256 of the footer files, keyed by (path, size, mtime)
+_FOOTER_DIGESTS = {}
+
+def get_footer(footer_pdf_path):
+    """
+    Return the opened footer PDF for a path, loading and validating it on first use.
+    The document stays open and is reused by every output of the process.
+    Returns None if the footer is missing or empty; that result is cached as well.
+    """
+    import fitz  # PyMuPDF for PDF manipulation
+
+    if footer_pdf_path not in _FOOTER_CACHE:
+        footer_pdf = None
+        if not os.path.exists(footer_pdf_path):
+            logger.error("Footer file not found at %s", footer_pdf_path)
+        else:
+            footer_pdf = fitz.open(footer_pdf_path)
+            if footer_pdf.page_count == 0:
+                logger.error("Footer file has no pages: %s", footer_pdf_path)
+                footer_pdf.close()
+                footer_pdf = None
+        _FOOTER_CACHE[footer_pdf_path] = footer_pdf
+    return _FOOTER_CACHE[footer_pdf_path]
+
+def close_footers():
+    """
+    Close every cached footer document.
+    """
+    for footer_pdf in _FOOTER_CACHE.values():
+        if footer_pdf is not None:
+            footer_pdf.close()
+    _FOOTER_CACHE.clear()
+
+def optimize_raster_footer(footer_pdf_path, output_path=None, upscale_factor=4, sharpness_factor=1.2,
+                           target_width=None):
+    """
+    Optimize a raster-based footer for higher quality output.
+    Allows setting a custom upscale factor and sharpness.
+    The main (first) raster of the footer is upscaled to target_width pixels, or by
+    upscale_factor without a target, sharpened and put back in place of the original
+    image, so the text and vector content of the footer are kept.
+    """
+    import fitz
+
+    if output_path is None:
+        output_path = footer_pdf_path.replace(".pdf", "_hq.pdf")
+
+    # Extract the raster image from the PDF at highest resolution
+    doc = fitz.open(footer_pdf_path)
+    page = doc[0]
+
+    # Get images from the page with high resolution
+    images = page.get_images(full=True)
+
+    if not images:
+        logger.warning("No images found in footer PDF %s", footer_pdf_path)
+        doc.close()
+        return footer_pdf_path
+
+    # Get the first image (assuming there is only one main image)
+    img_index = 0
+    xref = images[img_index][0]
+
+    # Extract the image
+    base_img = doc.extract_image(xref)
+    img_data = base_img["image"]
+
+    # Now upscale and sharpen the image, decoded straight from the extracted bytes
+    img = Image.open(io.BytesIO(img_data))
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    width, height = img.size
+
+    new_width = target_width or int(width * upscale_factor)
+    new_height = round(height * new_width / width)
+    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    # Apply sharpening
+    enhancer = ImageEnhance.Sharpness(img)
+    img = enhancer.enhance(sharpness_factor)
+
+    # Encode with high quality into memory
+    hq_buffer = io.BytesIO()
+    img.save(hq_buffer, format="PNG", dpi=(1200, 1200))
+
+    # Swap the high-quality raster in, at the same position on the page
+    page.replace_image(xref, stream=hq_buffer.getvalue())
+
+    # Save the footer with the high-quality raster
+    doc.save(output_path, garbage=4, deflate=True, clean=True)
+    doc.close()
+
+    logger.info("Optimized raster footer (%sx%s px, sharpness %s) saved to %s",
+                new_width, new_height, sharpness_factor, output_path)
+    return output_path
+
+def footer_digest(footer_pdf_path):
+    """
+    SHA-256 of a footer file, memoized per (path, size, mtime).
+    """
+    stat = os.stat(footer_pdf_path)
+    memo_key = (os.path.abspath(footer_pdf_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _FOOTER_DIGESTS:
+        with open(footer_pdf_path, "rb") as footer_file:
+            _FOOTER_DIGESTS[memo_key] = hashlib.sha256(footer_file.read()).hexdigest()
+    return _FOOTER_DIGESTS[memo_key]
+
+def footer_target_width(footer_pdf, panel_width_points, dpi, upscale_factor):
+    """
+    Pixel width of the footer's main raster once optimized for a panel of the given width
+    and resolution: upscaled by upscale_factor, but never beyond what the panel resolution
+    can show. Returns None when the raster is already fine enough and is used as it is.
+    """
+    page = footer_pdf[0]
+    images = page.get_images(full=True)
+    if not images:
+        return None
+    xref, width = images[0][0], images[0][2]
+    image_rects = page.get_image_rects(xref)
+    if not image_rects:
+        return None
+
+    # The footer is scaled to the panel width, so is its raster
+    displayed_inches = image_rects[0].width * panel_width_points / page.rect.width / 72
+    target_width = min(int(width * upscale_factor), int(displayed_inches * dpi))
+    return target_width if target_width > width else None
+
+def get_optimized_footer(footer_pdf_path, panel_width_points, dpi=72, upscale_factor=4, sharpness_factor=1.2):
+    """
+    Return the opened footer PDF with its raster optimized for the panel, see optimize_raster_footer.
+    Optimized footers are created once per (footer file hash, upscale, sharpness, target width)
+    in FOOTER_CACHE_DIR and reused by every later output. The original footer is returned when
+    no upscaling is needed at the panel resolution, or if the optimization fails.
+    Returns None if the footer itself is missing or empty, like get_footer.
+    """
+    footer_pdf = get_footer(footer_pdf_path)
+    if footer_pdf is None:
+        return None
+    target_width = footer_target_width(footer_pdf, panel_width_points, dpi, upscale_factor)
+    if target_width is None:
+        return footer_pdf
+
+    optimized_path = os.path.join(
+        FOOTER_CACHE_DIR,
+        f"{footer_digest(footer_pdf_path)}_x{upscale_factor}_s{sharpness_factor}_w{target_width}.pdf")
+    if not os.path.exists(optimized_path):
+        try:
+            os.makedirs(FOOTER_CACHE_DIR, exist_ok=True)
+            # Stage and rename, so concurrent workers never open a partial file
+            fd, staged = tempfile.mkstemp(dir=FOOTER_CACHE_DIR, suffix=".tmp")
+            os.close(fd)
+            try:
+                optimize_raster_footer(footer_pdf_path, staged, upscale_factor, sharpness_factor, target_width)
+                os.replace(staged, optimized_path)
+            finally:
+                if os.path.exists(staged):
+                    os.remove(staged)
+        except Exception:
+            logger.exception("Could not optimize footer %s, using it as it is", footer_pdf_path)
+            return footer_pdf
+    return get_footer(optimized_path) or footer_pdf
+
+def enhancement_lut(img, contrast=1.2, brightness=1.1):
+    """
+    Build the per-channel lookup table applying ImageEnhance.Contrast and then
+    ImageEnhance.Brightness to an RGB image, as one img.point() table.
+    Both enhancers blend every channel value independently against a constant
+    (the mean luminance for contrast, black for brightness), so running the same
+    Image.blend calls over a 256 value ramp reproduces them exactly.
+    """
+    # Mean luminance of the image, as computed by ImageEnhance.Contrast
+    histogram = img.convert("L").histogram()
+    mean = int(sum(value * count for value, count in enumerate(histogram)) / sum(histogram) + 0.5)
+
+    ramp = Image.frombytes("L", (256, 1), bytes(range(256)))
+    ramp = Image.blend(Image.new("L", ramp.size, mean), ramp, contrast)
+    ramp = Image.blend(Image.new("L", ramp.size, 0), ramp, brightness)
+    return list(ramp.tobytes()) * 3
+
+def sharpen_filter(sharpness=1.3):
+    """
+    Single 3x3 kernel equivalent to ImageEnhance.Sharpness.
+    Sharpness blends the image with its SMOOTH-filtered copy, img + (s - 1) * (img - smooth),
+    which is the SMOOTH kernel folded into one convolution.
+    """
+    smooth = ImageFilter.SMOOTH.filterargs[3]
+    weights = [-(sharpness - 1) * weight / 13 for weight in smooth]
+    weights[4] += sharpness
+    return ImageFilter.Kernel((3, 3), weights, scale=1)
+
+def enhance_bands(img, lut, kernel=None, threads=2):
+    """
+    Apply an enhancement lookup table and sharpen kernel (see enhance_image) to img in
+    threads horizontal bands on a thread pool; PIL releases the GIL while filtering.
+    Each band is filtered with one row of overlap on either side, the support of the 3x3
+    kernel, so the stitched image matches a whole-image pass exactly.
+    """
+    band_rows = -(-img.height // threads)
+
+    def enhance_band(top):
+        bottom = min(top + band_rows, img.height)
+        # One row of context above and below, cropped off again after the kernel pass
+        context_top, context_bottom = max(top - 1, 0), min(bottom + 1, img.height)
+        band = img.crop((0, context_top, img.width, context_bottom)).point(lut)
+        if kernel is not None:
+            band = band.filter(kernel)
+        return band.crop((0, top - context_top, img.width, bottom - context_top))
+
+    output = Image.new(img.mode, img.size)
+    tops = range(0, img.height, band_rows)
+    with ThreadPoolExecutor(threads) as executor:
+        for top, band in zip(tops, executor.map(enhance_band, tops)):
+            output.paste(band, (0, top))
+    return output
+
+def enhance_image(image_path, contrast=1.2, brightness=1.1, sharpness=1.3, target_width=None, threads=1):
+    """
+    Enhance image quality with adjustable parameters.
+    Contrast and brightness are applied as one lookup table and sharpening as one kernel
+    pass, instead of three ImageEnhance passes that each allocate full-size copies.
+    Matches the ImageEnhance chain within one level per channel.
+    target_width is the width the image is resized to afterwards (see master_width). A source
+    wider than REDUCING_GAP times target_width is decoded at a reduced scale (JPEG draft mode)
+    and pre-shrunk by an integer factor with Image.reduce, so decoding, enhancing and the final
+    LANCZOS resample work on a fraction of the pixels.
+    With threads > 1 the enhancement runs band-parallel, see enhance_bands.
+    Returns the enhanced image in memory so it can be shared by every brand and variant.
+    """
+    img = Image.open(image_path)
+    min_width = target_width * REDUCING_GAP if target_width else None
+    if min_width and img.width > min_width:
+        # Only JPEG decodes at scale, other formats ignore the draft request
+        img.draft(None, (min_width, img.height * min_width // img.width))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if min_width and img.width // min_width > 1:
+        logger.debug("Pre-shrinking %sx%s source by %s", img.width, img.height, img.width // min_width)
+        img = img.reduce(img.width // min_width)
+
+    # Apply enhancements
+    lut = enhancement_lut(img, contrast, brightness)
+    kernel = sharpen_filter(sharpness) if sharpness != 1 else None
+    if threads > 1:
+        return enhance_bands(img, lut, kernel, threads)
+    img = img.point(lut)
+    if kernel is not None:
+        img = img.filter(kernel)
+
+    return img
+
+def encode_panel_image(img, encoding="production"):
+    """
+    Encode an RGB image with one of the ENCODING_PROFILES.
+    Returns the PDF filter name and the encoded stream bytes.
+    """
+    profile = ENCODING_PROFILES[encoding]
+    if profile["format"] == "JPEG":
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=profile["quality"])
+        return "DCTDecode", buffer.getvalue()
+    return "FlateDecode", zlib.compress(img.tobytes(), profile["level"])
+
+def embed_image(c, image_size, pdf_filter, stream, name="panel"):
+    """
+    Register an encoded RGB image (see encode_panel_image) as an image XObject of the canvas,
+    under a name unique within the canvas.
+    The encoded stream is written to the PDF as it is, reportlab does not re-encode it.
+    An image already registered under name is not embedded again, only made available
+    to the current page or form.
+    Returns the XObject name to use with a "Do" operator.
+    """
+    from reportlab.pdfbase import pdfdoc
+
+    reg_name = c._doc.getXObjectName(name)
+    if not c._doc.hasForm(name):
+        img_obj = pdfdoc.PDFImageXObject(name)
+        img_obj.width, img_obj.height = image_size
+        img_obj.bitsPerComponent = 8
+        img_obj.colorSpace = "DeviceRGB"
+        img_obj._filters = (pdf_filter,)
+        img_obj.streamContent = stream
+        img_obj.mask = None
+
+        # Register the XObject the same way canvas.drawImage does
+        c._setXObjects(img_obj)
+        c._doc.Reference(img_obj, reg_name)
+        c._doc.addForm(name, img_obj)
+    c._formsinuse.append(name)
+    return reg_name
+
+def extended_tile_width_points(width_ft=2, bleed_mm=2):
+    """
+    Panel width in points, extended by the bleed on each side.
+    """
+    # Convert feet to points (1 inch = 72 points, 1 foot = 12 inches)
+    tile_width_points = width_ft * 12 * 72
+
+    # Set bleed value based on parameter
+    bleed_points = BLEED_2MM_POINTS if bleed_mm == 2 else BLEED_3MM_POINTS
+
+    # Add horizontal extension to each side (increasing tile width)
+    return tile_width_points + (2 * bleed_points)
+
+def tile_pixel_size(img_size, width_ft=2, bleed_mm=2, dpi=72):
+    """
+    Pixel size of one resized tile: the image scaled to fill the extended panel width at dpi.
+    """
+    img_width, img_height = img_size
+    extended_tile_width = extended_tile_width_points(width_ft, bleed_mm)
+
+    # Calculate scaling factor based on the extended tile width at the requested resolution
+    # This ensures the image is scaled to fill the entire extended width
+    scale_factor = extended_tile_width * dpi / 72 / img_width
+    new_width = int(extended_tile_width * dpi / 72)  # Convert to integer for PIL
+    new_height = int(img_height * scale_factor)
+    return new_width, new_height
+
+def tile_placement(image_size, width_ft=2, bleed_mm=2, dpi=72):
+    """
+    Placement of the master tile image (see render_master) on a panel with bleed_mm, in points.
+    Returns (image_width, tile_width, tile_height, x_offset): the master is drawn image_width
+    wide at x_offset inside a tile form of tile_width. A smaller bleed than MASTER_BLEED_MM
+    shows the centre of the master, cropped by the form, so the pattern scale is the same
+    for every bleed.
+    """
+    image_width = image_size[0] * 72 / dpi
+    tile_height = image_size[1] * 72 / dpi
+    # Negative for a smaller bleed: the master is cropped evenly on both sides
+    x_offset = (extended_tile_width_points(width_ft, bleed_mm) - extended_tile_width_points(width_ft, MASTER_BLEED_MM)) / 2
+    return image_width, min(image_width, image_width + 2 * x_offset), tile_height, x_offset
+
+def master_width(width_ft=2, dpi=72):
+    """
+    Pixel width of the master tile image at dpi, see render_master.
+    """
+    return int(extended_tile_width_points(width_ft, MASTER_BLEED_MM) * dpi / 72)
+
+def render_master(enhanced_img, width_ft=2, dpi=72, encoding="production", timer=None, threads=1):
+    """
+    Resize and encode the master tile image, the enhanced image scaled to the panel width
+    extended by MASTER_BLEED_MM at dpi. The master serves every height and bleed, see tile_placement.
+    With threads > 1 the image is resized in that many bands in parallel, see iter_resized_bands.
+    Returns (image_size, pdf_filter, stream); the resize and encode stages are recorded on timer.
+    """
+    timer = timer or samples_metrics.StageTimer()
+    new_width, new_height = tile_pixel_size(enhanced_img.size, width_ft, MASTER_BLEED_MM, dpi)
+    if enhanced_img.width < new_width:
+        logger.warning("Input image is too small and will be upscaled, resulting in reduced quality.")
+
+    # Resize image using high-quality resampling
+    with timer.stage("resize"):
+        if threads > 1:
+            img = Image.new(enhanced_img.mode, (new_width, new_height))
+            top = 0
+            for band in iter_resized_bands(enhanced_img, img.size, -(-new_height // threads), threads):
+                img.paste(band, (0, top))
+                top += band.height
+        else:
+            img = enhanced_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    with timer.stage("encode"):
+        pdf_filter, stream = encode_panel_image(img, encoding)
+    return img.size, pdf_filter, stream
+
+def create_base_panel(enhanced_img, height_ft, width_ft=2, dpi=72, bleed_mm=2, subject=None,
+                      encoding="production", timer=None, master=None):
+    """
+    Create the tiled large-format base panel for one (height, bleed) combination.
+    The base panel does not depend on the substrate or the brand, so it can be shared by
+    every variant and only the footer needs to be stamped per output.
+    The panel is built in memory and returned as PDF bytes, nothing is written to disk.
+    dpi is the effective resolution of the embedded image.
+    encoding selects the ENCODING_PROFILES entry used for the embedded image.
+    master is the encoded master image from render_master; it is rendered here if not given.
+    The resize, encode and canvas_write stages are recorded on timer (a samples_metrics.StageTimer).
+    """
+    timer = timer or samples_metrics.StageTimer()
+    img_width, img_height = enhanced_img.size
+    logger.debug("Checking image resolution: %sx%s", img_width, img_height)
+
+    # Calculate required resolution for quality printing (1200 DPI)
+    required_width = int(width_ft * 12 * dpi)  # Convert feet to inches, then to pixels at dpi
+    required_height = int(height_ft * 12 * dpi)
+    logger.debug("Required for %sft x %sft at %s DPI: %sx%s", width_ft, height_ft, dpi, required_width, required_height)
+
+    if master is None:
+        master = render_master(enhanced_img, width_ft=width_ft, dpi=dpi, encoding=encoding, timer=timer)
+    with timer.stage("canvas_write"):
+        return write_panel_pdf(*master, height_ft, width_ft=width_ft, dpi=dpi, bleed_mm=bleed_mm, subject=subject)
+
+def write_panel_pdf(image_size, pdf_filter, stream, height_ft, width_ft=2, dpi=72, bleed_mm=2, subject=None):
+    """
+    Write the tiled base panel PDF around an encoded master image (see render_master)
+    and return it as bytes. image_size is the master size in pixels at dpi.
+    """
+    output_pdf = write_panel_pages((image_size, pdf_filter, stream), [(height_ft, bleed_mm)],
+                                   width_ft=width_ft, dpi=dpi, title=f"{height_ft}ft {bleed_mm}mm",
+                                   subject=subject)
+    logger.info("Base panel created: %sft %smm", height_ft, bleed_mm)
+    return output_pdf
+
+def write_panel_pages(master, pages, width_ft=2, dpi=72, title=None, subject=None):
+    """
+    Write a tiled base panel PDF with one page per (height_ft, bleed_mm) in pages and return it as bytes.
+    master is the encoded master image (image_size, pdf_filter, stream), see render_master.
+    It is embedded once and drawn by one form XObject per bleed, placed by tile_placement,
+    which every page of that bleed references.
+    """
+    from reportlab.pdfgen import canvas
+
+    output_pdf = io.BytesIO()
+    image_size, pdf_filter, stream = master
+    bleeds = list(dict.fromkeys(bleed_mm for _, bleed_mm in pages))
+
+    # Create PDF with high DPI, using the extended width
+    c = canvas.Canvas(output_pdf)
+    c.setAuthor("Automated PDF Generator")
+    c.setTitle(title or "Sample panels")
+    c.setSubject(subject or "High-Quality Print")
+    c.setKeywords(["large format", "high quality", "print"] + [f"{bleed_mm}mm bleed" for bleed_mm in bleeds])
+
+    # Height of one tile on the page in points, the same for every bleed
+    tile_height = image_size[1] * 72 / dpi
+    for bleed_mm in bleeds:
+        image_width, tile_width, _, x_offset = tile_placement(image_size, width_ft, bleed_mm, dpi)
+
+        # Draw the image once into a form XObject, every tile references the same form
+        # so file size and build time do not grow with the panel height
+        c.beginForm(f"tile{bleed_mm}", lowerx=0, lowery=0, upperx=tile_width, uppery=tile_height)
+        image_name = embed_image(c, image_size, pdf_filter, stream)
+        c.saveState()
+        # Centre the master on a smaller bleed, the form bounding box crops its sides
+        if x_offset < 0:
+            c.translate(x_offset, 0)
+        c.scale(image_width, tile_height)
+        c._code.append(f"/{image_name} Do")
+        c.restoreState()
+        c.endForm()
+
+    for height_ft, bleed_mm in pages:
+        # Convert feet to points (1 inch = 72 points, 1 foot = 12 inches)
+        total_height_points = height_ft * 12 * 72
+        c.setPageSize((extended_tile_width_points(width_ft, bleed_mm), total_height_points))
+
+        # Calculate the number of times the image should be repeated vertically
+        tile_count = int(total_height_points // tile_height) + 1
+
+        y_position = 0
+        for _ in range(tile_count):
+            c.saveState()
+            c.translate(0, y_position)
+            c.doForm(f"tile{bleed_mm}")
+            c.restoreState()
+
+            y_position += tile_height  # Move up for the next tile
+        c.showPage()
+
+    c.save()
+    return output_pdf.getvalue()
+
+def iter_resized_bands(img, size, band_rows=512, threads=1):
+    """
+    Resize img to size with LANCZOS one horizontal band of output rows at a time.
+    Each band is resampled from the source box it covers; PIL reads the filter support
+    around the box from the full source, so the stacked bands match a single resize
+    without seams while only one output band is held in memory.
+    With threads > 1 up to threads bands are resampled at once on a thread pool, PIL
+    releases the GIL while resampling; the bands are still yielded in order.
+    """
+    new_width, new_height = size
+    scale_y = img.height / new_height
+
+    def resize_band(top):
+        rows = min(band_rows, new_height - top)
+        return img.resize((new_width, rows), Image.Resampling.LANCZOS,
+                          box=(0, top * scale_y, img.width, (top + rows) * scale_y))
+
+    tops = range(0, new_height, band_rows)
+    if threads <= 1:
+        yield from map(resize_band, tops)
+        return
+    with ThreadPoolExecutor(threads) as executor:
+        pending = collections.deque()
+        for top in tops:
+            pending.append(executor.submit(resize_band, top))
+            # Keep at most threads bands in flight, so memory stays bounded by the band size
+            if len(pending) >= threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def check_stream_encoding(encoding, tier="proof", streaming=None):
+    """
+    Raise ValueError if the panel is streamed, by the tier or by streaming, with an encoding
+    profile that cannot be streamed: only Flate profiles can, see stream_master.
+    """
+    if streaming is None:
+        streaming = RESOLUTION_TIERS[tier]["streaming"]
+    if streaming and ENCODING_PROFILES[encoding]["format"] != "Flate":
+        raise ValueError(f"Encoding profile '{encoding}' cannot be streamed, use a Flate profile")
+
+def stream_master(enhanced_img, width_ft=2, dpi=1200, encoding="production", band_rows=512, temp_dir=None,
+                  timer=None, threads=1):
+    """
+    Stream the master tile image (see render_master) into a temporary file in temp_dir as a
+    raw Flate stream, resampling and compressing it band by band so that peak memory is
+    bounded by band_rows rather than by the image size. Only Flate encoding profiles can be streamed.
+    Returns (image_size, stream_path); the caller removes the file.
+    Resizing and compressing are interleaved and recorded on timer as a single stream_panel stage;
+    with threads > 1 the bands are resampled in parallel while the previous ones are compressed.
+    """
+    timer = timer or samples_metrics.StageTimer()
+    check_stream_encoding(encoding, streaming=True)
+    profile = ENCODING_PROFILES[encoding]
+
+    new_width, new_height = tile_pixel_size(enhanced_img.size, width_ft, MASTER_BLEED_MM, dpi)
+    if enhanced_img.width < new_width:
+        logger.warning("Input image is too small and will be upscaled, resulting in reduced quality.")
+    logger.debug("Streaming %sx%s px master at %s DPI in bands of %s rows", new_width, new_height, dpi, band_rows)
+
+    fd, stream_path = tempfile.mkstemp(prefix="temp_master_", suffix=".zlib", dir=temp_dir)
+    try:
+        with timer.stage("stream_panel"), os.fdopen(fd, "wb") as output:
+            compressor = zlib.compressobj(profile["level"])
+            for band in iter_resized_bands(enhanced_img, (new_width, new_height), band_rows, threads):
+                output.write(compressor.compress(band.tobytes()))
+            output.write(compressor.flush())
+    except Exception:
+        os.remove(stream_path)
+        raise
+    return (new_width, new_height), stream_path
+
+def _pdf_text(text):
+    """
+    Encode text as a PDF text string (UTF-16BE with byte order mark).
+    """
+    return "<FEFF" + text.encode("utf-16-be").hex().upper() + ">"
+
+def write_streamed_panel(output_path, pages, master, width_ft=2, dpi=1200, info=None):
+    """
+    Write a tiled panel PDF around a streamed master image (image_size, stream_path), see
+    stream_master. The compressed stream is copied into the PDF in chunks, so the image is
+    never held in memory.
+    pages lists (height_ft, bleed_mm); like write_panel_pages, the image is embedded once
+    and drawn by one form XObject per bleed that every page of that bleed references.
+    """
+    (image_width_px, image_height_px), stream_path = master
+    bleeds = list(dict.fromkeys(bleed_mm for _, bleed_mm in pages))
+    offsets = {}
+    # 1: catalog, 2: page tree, 3: info, 4: image, then two objects per page and one form per bleed
+    page_numbers = [(5 + 2 * index, 6 + 2 * index) for index in range(len(pages))]
+    form_numbers = {bleed_mm: 5 + 2 * len(pages) + index for index, bleed_mm in enumerate(bleeds)}
+
+    with open(output_path, "wb") as pdf:
+        def begin_object(number):
+            offsets[number] = pdf.tell()
+            pdf.write(f"{number} 0 obj\n".encode())
+
+        def write_stream_object(number, dictionary, data):
+            begin_object(number)
+            pdf.write(f"<< {dictionary} /Length {len(data)} >>\nstream\n".encode())
+            pdf.write(data)
+            pdf.write(b"\nendstream\nendobj\n")
+
+        pdf.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        begin_object(1)
+        pdf.write(b"<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+        begin_object(2)
+        kids = " ".join(f"{page_number} 0 R" for page_number, _ in page_numbers)
+        pdf.write(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>\nendobj\n".encode())
+        begin_object(3)
+        entries = " ".join(f"/{key} {_pdf_text(value)}" for key, value in (info or {}).items())
+        pdf.write(f"<< {entries} >>\nendobj\n".encode())
+
+        # Image stream, copied from the already compressed master
+        begin_object(4)
+        pdf.write((f"<< /Type /XObject /Subtype /Image /Width {image_width_px} /Height {image_height_px} "
+                   f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode "
+                   f"/Length {os.path.getsize(stream_path)} >>\nstream\n").encode())
+        with open(stream_path, "rb") as stream:
+            shutil.copyfileobj(stream, pdf, 1024 * 1024)
+        pdf.write(b"\nendstream\nendobj\n")
+
+        tile_height = image_height_px * 72 / dpi
+        for (height_ft, bleed_mm), (page_number, content_number) in zip(pages, page_numbers):
+            # Convert feet to points (1 inch = 72 points, 1 foot = 12 inches)
+            total_height_points = height_ft * 12 * 72
+            tile_count = int(total_height_points // tile_height) + 1
+            begin_object(page_number)
+            pdf.write((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 "
+                       f"{extended_tile_width_points(width_ft, bleed_mm):.4f} {total_height_points:.4f}] "
+                       f"/Resources << /XObject << /Tile {form_numbers[bleed_mm]} 0 R >> >> "
+                       f"/Contents {content_number} 0 R >>\nendobj\n").encode())
+
+            # Page content, one reference to the tile form per repeat, moving up for the next tile
+            content = "".join(f"q 1 0 0 1 0 {i * tile_height:.4f} cm /Tile Do Q\n" for i in range(tile_count))
+            write_stream_object(content_number, "", content.encode())
+
+        for bleed_mm, form_number in form_numbers.items():
+            image_width, tile_width, _, x_offset = tile_placement(
+                (image_width_px, image_height_px), width_ft, bleed_mm, dpi)
+            form = f"q {image_width:.4f} 0 0 {tile_height:.4f} {x_offset:.4f} 0 cm /Im0 Do Q".encode()
+            write_stream_object(form_number,
+                                f"/Type /XObject /Subtype /Form /BBox [0 0 {tile_width:.4f} {tile_height:.4f}] "
+                                f"/Resources << /XObject << /Im0 4 0 R >> >>", form)
+
+        xref_offset = pdf.tell()
+        pdf.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        for number in sorted(offsets):
+            pdf.write(f"{offsets[number]:010d} 00000 n \n".encode())
+        pdf.write((f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R /Info 3 0 R >>\n"
+                   f"startxref\n{xref_offset}\n%%EOF\n").encode())
+
+def create_streamed_base_panel(enhanced_img, height_ft, width_ft=2, dpi=1200, bleed_mm=2, subject=None,
+                               encoding="production", band_rows=512, temp_dir=None, timer=None, master=None):
+    """
+    Create the tiled base panel at the full dpi resolution without holding the resized
+    raster in memory. The master image is resampled band by band and compressed into a
+    temporary stream file by stream_master, then copied into the PDF, so peak memory is
+    bounded by band_rows rather than by the panel size.
+    master is a streamed master from stream_master, shared by several base panels; it is
+    streamed here, and removed afterwards, if not given.
+    Only Flate encoding profiles can be streamed.
+    Returns the path of a temporary base PDF in temp_dir; the caller removes it.
+    The stream_panel and canvas_write stages are recorded on timer.
+    """
+    timer = timer or samples_metrics.StageTimer()
+    logger.debug("Checking image resolution: %sx%s", *enhanced_img.size)
+    bleed_label = f"{bleed_mm}mm"
+
+    own_master = master is None
+    if own_master:
+        master = stream_master(enhanced_img, width_ft=width_ft, dpi=dpi, encoding=encoding,
+                               band_rows=band_rows, temp_dir=temp_dir, timer=timer)
+    fd, output_pdf = tempfile.mkstemp(prefix=f"temp_{height_ft}ft_{bleed_label}_", suffix=".pdf", dir=temp_dir)
+    os.close(fd)
+    try:
+        with timer.stage("canvas_write"):
+            write_streamed_panel(
+                output_pdf, [(height_ft, bleed_mm)], master, width_ft=width_ft, dpi=dpi,
+                info={
+                    "Author": "Automated PDF Generator",
+                    "Title": f"{height_ft}ft {bleed_label}",
+                    "Subject": subject or "High-Quality Print",
+                    "Keywords": f"large format, high quality, print, {bleed_mm}mm bleed",
+                })
+    except Exception:
+        os.remove(output_pdf)
+        raise
+    finally:
+        if own_master:
+            os.remove(master[1])
+
+    logger.info("Streamed base panel created: %sft %s", height_ft, bleed_label)
+    return output_pdf
+
+def create_pdf(image_path, height_ft, substrate, width_ft=2, dpi=None,
+               spacing_points=20, design_name=None, bleed_mm=2, footer_upscale=4, footer_sharpness=1.2,
+               brand="anthem", encoding="production", tier="proof", save_profile=None, threads=1):
+    """
+    Create a tiled large-format PDF from an image, then overlay the correct footer at the bottom.
+    Adds the design_name (or image filename if not provided) to the footer.
+
+    Parameters:
+    - bleed_mm: Bleed value in mm (2mm or 3mm)
+    - substrate: One of "TRAD", "P&S", or "PP"
+    - footer_upscale: Upscale factor for the footer optimization (default: 4)
+    - footer_sharpness: Sharpness factor for the footer optimization (default: 1.2)
+    - brand: Key of the brand profile in BRANDS
+    - encoding: Image encoding profile in ENCODING_PROFILES (default: "production")
+    - tier: Resolution tier in RESOLUTION_TIERS (default: "proof")
+    - dpi: Effective resolution of the embedded image, overrides the tier's resolution
+    - save_profile: Save profile in SAVE_PROFILES (default: the brand's, or "delivery")
+    - threads: Threads for the band-parallel enhance and resize of the image (default: 1)
+    """
+    return create_variants(image_path, [height_ft], [substrate], [bleed_mm], width_ft=width_ft, dpi=dpi,
+                    spacing_points=spacing_points, design_name=design_name,
+                    footer_upscale=footer_upscale, footer_sharpness=footer_sharpness,
+                    brands=[brand], encoding=encoding, tier=tier, save_profile=save_profile, threads=threads)
+
+def variant_filename(design_name, substrate, height_ft, bleed_mm):
+    """
+    File name of a final PDF: [image_name]_[substrate]_[size]_[bleed]
+    """
+    return f"{design_name}_{substrate}_{height_ft}ft_{bleed_mm}mm.pdf"
+
+def plan_variants(heights, substrates, bleed_mm_values):
+    """
+    Group the requested outputs by their base panel.
+    Returns a dict mapping each distinct (height_ft, bleed_mm) to the list of substrates
+    that are stamped onto that base panel.
+    """
+    plan = {}
+    for height in heights:
+        for bleed_mm in bleed_mm_values:
+            plan[(height, bleed_mm)] = list(substrates)
+    return plan
+
+def create_variants(image_path, heights, substrates, bleed_mm_values, width_ft=2, dpi=None,
+                    spacing_points=20, design_name=None, footer_upscale=4, footer_sharpness=1.2,
+                    brands=None, output_dir=".", encoding="production", streaming=None, band_rows=512,
+                    tier="proof", enhancement=None, cache=None, save_profile=None, combined=False, threads=1):
+    """
+    Create every (brand, height, substrate, bleed) output for an image, see render_variants.
+    With combined=True all variants are written as the pages of one PDF instead, see
+    create_combined_pdf; the output cache is not used for it.
+    Returns the paths of the PDFs that were written.
+    Raises ValueError, before the image is read, if the panel is streamed with an encoding
+    profile that cannot be streamed.
+    """
+    check_stream_encoding(encoding, tier, streaming)
+    if combined:
+        combined_pdf = create_combined_pdf(image_path, heights, substrates, bleed_mm_values, width_ft=width_ft,
+                                           dpi=dpi, design_name=design_name, footer_upscale=footer_upscale,
+                                           footer_sharpness=footer_sharpness, brands=brands,
+                                           output_dir=output_dir, encoding=encoding, streaming=streaming,
+                                           band_rows=band_rows, tier=tier, enhancement=enhancement,
+                                           save_profile=save_profile, threads=threads)
+        return [combined_pdf] if combined_pdf else []
+
+    return [result["output"]
+            for result in render_variants(image_path, heights, substrates, bleed_mm_values, width_ft=width_ft,
+                                          dpi=dpi, spacing_points=spacing_points, design_name=design_name,
+                                          footer_upscale=footer_upscale, footer_sharpness=footer_sharpness,
+                                          brands=brands, output_dir=output_dir, encoding=encoding,
+                                          streaming=streaming, band_rows=band_rows, tier=tier,
+                                          enhancement=enhancement, cache=cache, save_profile=save_profile,
+                                          threads=threads)
+            if result["output"]]
+
+class WarningCollector(logging.Handler):
+    """
+    Logging handler keeping the messages of the warnings the engine logs while it is
+    attached; use it as a context manager around the calls to watch.
+    """
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        if record.levelno == logging.WARNING:
+            self.messages.append(record.getMessage())
+
+    def __enter__(self):
+        logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        logger.removeHandler(self)
+
+def variant_priority(priority):
+    """
+    Sort key of the (brand, height_ft, substrate, bleed_mm) variants for render_variants.
+    priority is a list of filters, dicts with any of the keys brand, substrate, height_ft and
+    bleed_mm; a variant sorts by the first filter it matches, after them if it matches none.
+    """
+    def key(variant):
+        values = dict(zip(("brand", "height_ft", "substrate", "bleed_mm"), variant))
+        for index, variant_filter in enumerate(priority):
+            if all(values.get(name) == value for name, value in variant_filter.items()):
+                return index
+        return len(priority)
+    return key
+
+def render_variants(image_path, heights, substrates, bleed_mm_values, width_ft=2, dpi=None,
+                    spacing_points=20, design_name=None, footer_upscale=4, footer_sharpness=1.2,
+                    brands=None, output_dir=".", encoding="production", streaming=None, band_rows=512,
+                    tier="proof", enhancement=None, cache=None, save_profile=None, threads=1,
+                    priority=None, cancel=None):
+    """
+    Render every (brand, height, substrate, bleed) output for an image and yield one result
+    per variant as soon as it is written.
+    The image is decoded, enhanced and resized to the master tile image once (see
+    render_master), each distinct (height, bleed) base panel is written once around that
+    master, and the brand and substrate outputs are produced by stamping the footer onto
+    the shared base panel. A base panel is released once its last variant is stamped.
+    With several brands, each brand writes into its own sub-directory of output_dir.
+    encoding selects the ENCODING_PROFILES entry for the panel image.
+    tier selects the RESOLUTION_TIERS entry that sets the effective resolution of the
+    panel image and whether it is streamed; dpi and streaming override the tier.
+    With streaming the master is streamed once by stream_master, band_rows output rows at
+    a time, the base panels are written by create_streamed_base_panel, and every output is
+    stamped as an incremental update of a copy of the streamed base file.
+    enhancement overrides the DEFAULT_ENHANCEMENT factors passed to enhance_image.
+    save_profile selects the SAVE_PROFILES entry of every output, overriding the brand profiles.
+    threads > 1 splits the enhance and resize of the image into bands processed on a thread
+    pool (see enhance_bands and iter_resized_bands), for a single large render on a multi-core machine.
+    With a samples_cache.OutputCache as cache, variants whose inputs and parameters are
+    unchanged are linked from the cache; the image is only enhanced and resized and a base
+    panel only rendered when at least one of its variants has to be rendered.
+    priority lists the variants to render first, see variant_priority; the others follow in
+    plan order.
+    cancel is an object with an is_set() method, such as a threading.Event, checked before
+    each variant: once it is set the remaining variants are not rendered. Closing the
+    generator early stops the same way; temporary files are removed in both cases.
+    Each result is the samples_metrics record of the variant, emitted as it is yielded: the
+    output path (None unless written), the status (ok, cached, failed or cancelled), the error,
+    the warnings logged while rendering it and the timings of its stages; the enhance, master
+    and base panel stages are shared by the variants built from them.
+    """
+    if brands is None:
+        brands = list(BRANDS)
+    if dpi is None:
+        dpi = RESOLUTION_TIERS[tier]["dpi"]
+    if streaming is None:
+        streaming = RESOLUTION_TIERS[tier]["streaming"]
+    enhancement = dict(DEFAULT_ENHANCEMENT, **(enhancement or {}))
+    # Get design name (if not provided, use the image filename without path and extension)
+    if design_name is None:
+        design_name = os.path.splitext(os.path.basename(image_path))[0]
+
+    def variant_result(brand, substrate, height_ft, bleed_mm, output, status, error, warnings, *timers):
+        stages = {}
+        for timer in timers:
+            stages.update(timer.stages)
+        result = {
+            "event": "variant", "pid": os.getpid(), "image": image_path, "design_name": design_name,
+            "brand": brand, "substrate": substrate, "height_ft": height_ft, "bleed_mm": bleed_mm,
+            "dpi": dpi, "encoding": encoding, "streaming": streaming,
+            "save_profile": save_profile or BRANDS[brand].get("save_profile", DEFAULT_SAVE_PROFILE),
+            "output": output, "status": status, "error": error, "warnings": warnings, "stages": stages,
+        }
+        samples_metrics.emit(result)
+        return result
+
+    # Every variant in render order, with the number of variants left on each base panel
+    variants = [(brand, height_ft, substrate, bleed_mm)
+                for (height_ft, bleed_mm), variant_substrates in plan_variants(heights, substrates, bleed_mm_values).items()
+                for brand in brands
+                for substrate in variant_substrates]
+    if priority:
+        variants.sort(key=variant_priority(priority))
+    remaining = collections.Counter((height_ft, bleed_mm) for _, height_ft, _, bleed_mm in variants)
+
+    # Decoded, enhanced and resized once for all brands and variants, on the first variant to render
+    enhanced_img = None
+    master = None
+    image_digest = None
+    # Error of the shared stages, every later variant fails with it
+    failure = None
+    enhance_timer = samples_metrics.StageTimer()
+    design_warnings = WarningCollector()
+    # Base panel and its timer per (height, bleed), while variants of it are left
+    base_panels = {}
+
+    def build_base_panel(height_ft, bleed_mm, base_timer):
+        nonlocal enhanced_img, master
+        with design_warnings:
+            if enhanced_img is None:
+                with enhance_timer.stage("enhance"):
+                    enhanced_img = enhance_image(image_path, target_width=master_width(width_ft, dpi),
+                                                  threads=threads, **enhancement)
+                if streaming:
+                    master = stream_master(enhanced_img, width_ft=width_ft, dpi=dpi,
+                                           encoding=encoding, band_rows=band_rows, temp_dir=output_dir,
+                                           timer=enhance_timer, threads=threads)
+                else:
+                    master = render_master(enhanced_img, width_ft=width_ft, dpi=dpi,
+                                           encoding=encoding, timer=enhance_timer, threads=threads)
+            if streaming:
+                return create_streamed_base_panel(enhanced_img, height_ft, width_ft=width_ft, dpi=dpi,
+                                                  bleed_mm=bleed_mm, subject=f"High-Quality Print for {design_name}",
+                                                  encoding=encoding, band_rows=band_rows, temp_dir=output_dir,
+                                                  timer=base_timer, master=master)
+            return create_base_panel(enhanced_img, height_ft, width_ft=width_ft, dpi=dpi, bleed_mm=bleed_mm,
+                                     subject=f"High-Quality Print for {design_name}", encoding=encoding,
+                                     timer=base_timer, master=master)
+
+    def render_variant(brand, height_ft, substrate, bleed_mm, variant_timer):
+        nonlocal image_digest, failure
+        profile = BRANDS[brand]
+        # Output directory per brand, so the brands do not overwrite each other's files
+        brand_dir = output_dir if len(brands) == 1 else os.path.join(output_dir, profile["name"])
+        os.makedirs(brand_dir, exist_ok=True)
+        final_pdf = os.path.join(brand_dir, variant_filename(design_name, substrate, height_ft, bleed_mm))
+
+        cache_key = None
+        if cache is not None:
+            if image_digest is None:
+                image_digest = cache.file_digest(image_path)
+            cache_key = cache.variant_key(
+                image_digest, os.path.join(profile["footer_dir"], profile["footer_file"]), FONT_PATH,
+                {"brand": profile, "font": get_font().name, "design_name": design_name,
+                 "height_ft": height_ft, "substrate": substrate, "bleed_mm": bleed_mm,
+                 "width_ft": width_ft, "dpi": dpi, "encoding": encoding, "streaming": streaming,
+                 "enhancement": enhancement, "footer_upscale": footer_upscale,
+                 "footer_sharpness": footer_sharpness,
+                 "save_profile": save_profile or profile.get("save_profile", DEFAULT_SAVE_PROFILE)})
+            with WarningCollector() as cache_warnings, variant_timer.stage("cache_fetch"):
+                try:
+                    hit = cache.fetch(cache_key, final_pdf)
+                except OSError as e:
+                    # An unreadable cache only costs the render
+                    logger.warning("Output cache lookup failed, rendering %s: %s", final_pdf, e)
+                    hit = False
+            if hit:
+                logger.info("Unchanged, reused from cache: %s", final_pdf)
+                return variant_result(brand, substrate, height_ft, bleed_mm, final_pdf, "cached", None,
+                                      cache_warnings.messages, variant_timer)
+
+        base_timer = samples_metrics.StageTimer()
+        if failure is None and (height_ft, bleed_mm) not in base_panels:
+            try:
+                base_panels[(height_ft, bleed_mm)] = (build_base_panel(height_ft, bleed_mm, base_timer), base_timer)
+            except Exception as e:
+                logger.exception("Rendering %s failed", image_path)
+                failure = str(e)
+        if failure is not None:
+            return variant_result(brand, substrate, height_ft, bleed_mm, None, "failed", failure,
+                                  list(design_warnings.messages), enhance_timer, base_timer, variant_timer)
+
+        base_pdf, base_timer = base_panels[(height_ft, bleed_mm)]
+        with WarningCollector() as variant_warnings:
+            final_pdf = overlay_footer(base_pdf, height_ft, substrate, False, spacing_points, design_name, bleed_mm,
+                                       footer_upscale=footer_upscale, footer_sharpness=footer_sharpness,
+                                       keep_base=True, brand=brand, output_dir=brand_dir,
+                                       incremental=streaming, timer=variant_timer, dpi=dpi,
+                                       save_profile=save_profile)
+            if final_pdf and cache_key is not None:
+                with variant_timer.stage("cache_store"):
+                    try:
+                        cache.store(cache_key, final_pdf)
+                    except OSError as e:
+                        # The output is written, only later runs lose the cache entry
+                        logger.warning("Could not store %s in the output cache: %s", final_pdf, e)
+        return variant_result(brand, substrate, height_ft, bleed_mm, final_pdf, "ok" if final_pdf else "failed",
+                              variant_timer.error, design_warnings.messages + variant_warnings.messages,
+                              enhance_timer, base_timer, variant_timer)
+
+    try:
+        for brand, height_ft, substrate, bleed_mm in variants:
+            base_key = (height_ft, bleed_mm)
+            remaining[base_key] -= 1
+            variant_timer = samples_metrics.StageTimer()
+            try:
+                if cancel is not None and cancel.is_set():
+                    result = variant_result(brand, substrate, height_ft, bleed_mm, None, "cancelled", None, [],
+                                            variant_timer)
+                else:
+                    result = render_variant(brand, height_ft, substrate, bleed_mm, variant_timer)
+            except Exception as e:
+                # Only this variant fails, the others are still rendered and reported
+                logger.exception("Rendering %s %s %sft %smm of %s failed", brand, substrate, height_ft, bleed_mm,
+                                 image_path)
+                result = variant_result(brand, substrate, height_ft, bleed_mm, None, "failed", str(e),
+                                        list(design_warnings.messages), variant_timer)
+
+            # Release the base panel once its last variant is done, whatever the outcome
+            if remaining[base_key] == 0 and base_key in base_panels:
+                release_base_panel(base_panels.pop(base_key)[0])
+            yield result
+
+    finally:
+        # Clean up the streamed base panels and master, also when cancelled or closed early
+        for base_pdf, _ in base_panels.values():
+            release_base_panel(base_pdf)
+        if streaming and master is not None:
+            os.remove(master[1])
+
+def release_base_panel(base_pdf):
+    """
+    Release a base panel from create_base_panel or create_streamed_base_panel once its
+    variants are stamped: a streamed base panel is a temporary file and is removed.
+    """
+    if isinstance(base_pdf, str):
+        os.remove(base_pdf)
+
+def create_combined_pdf(image_path, heights, substrates, bleed_mm_values, width_ft=2, dpi=None,
+                        design_name=None, footer_upscale=4, footer_sharpness=1.2, brands=None, output_dir=".",
+                        encoding="production", streaming=None, band_rows=512, tier="proof", enhancement=None,
+                        save_profile=None, threads=1):
+    """
+    Write every (brand, height, substrate, bleed) variant of an image as a page of one PDF,
+    [design_name]_combined.pdf in output_dir.
+    The master tile image is resized and embedded once and drawn by one tile form per bleed
+    that every page of that bleed references, and each brand footer is embedded once and
+    shared by the pages of that brand, so the file costs about as much as one variant.
+    The options are those of create_variants; with several brands the save profile is
+    save_profile or DEFAULT_SAVE_PROFILE. Pages are bookmarked by brand and variant.
+    Returns the path of the PDF, or None if it could not be written.
+    """
+    import fitz
+
+    if brands is None:
+        brands = list(BRANDS)
+    if dpi is None:
+        dpi = RESOLUTION_TIERS[tier]["dpi"]
+    if streaming is None:
+        streaming = RESOLUTION_TIERS[tier]["streaming"]
+    enhancement = dict(DEFAULT_ENHANCEMENT, **(enhancement or {}))
+    if design_name is None:
+        design_name = os.path.splitext(os.path.basename(image_path))[0]
+    if save_profile is None:
+        save_profile = BRANDS[brands[0]].get("save_profile", DEFAULT_SAVE_PROFILE) if len(brands) == 1 \
+            else DEFAULT_SAVE_PROFILE
+
+    # One page per variant, grouped by brand and then by base panel
+    variants = [(brand, height_ft, substrate, bleed_mm)
+                for brand in brands
+                for (height_ft, bleed_mm), variant_substrates in plan_variants(heights, substrates, bleed_mm_values).items()
+                for substrate in variant_substrates]
+    timer = samples_metrics.StageTimer()
+    final_pdf_path = os.path.join(output_dir, f"{design_name}_combined.pdf")
+    base_pdf_path = None
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        # Replace an existing output instead of writing through it
+        if os.path.exists(final_pdf_path):
+            os.remove(final_pdf_path)
+
+        with timer.stage("enhance"):
+            enhanced_img = enhance_image(image_path, target_width=master_width(width_ft, dpi), threads=threads,
+                                         **enhancement)
+
+        subject = f"High-Quality Print for {design_name}"
+        pages = [(height_ft, bleed_mm) for _, height_ft, _, bleed_mm in variants]
+        if streaming:
+            master = stream_master(enhanced_img, width_ft=width_ft, dpi=dpi, encoding=encoding,
+                                   band_rows=band_rows, temp_dir=output_dir, timer=timer, threads=threads)
+            fd, base_pdf_path = tempfile.mkstemp(prefix="temp_combined_", suffix=".pdf", dir=output_dir)
+            os.close(fd)
+            try:
+                with timer.stage("canvas_write"):
+                    write_streamed_panel(
+                        base_pdf_path, pages, master, width_ft=width_ft, dpi=dpi,
+                        info={"Author": "Automated PDF Generator", "Title": f"{design_name} variants",
+                              "Subject": subject, "Keywords": "large format, high quality, print"})
+            finally:
+                os.remove(master[1])
+            # Stamp the pages as an incremental update of a copy of the streamed base
+            shutil.copyfile(base_pdf_path, final_pdf_path)
+            doc = fitz.open(final_pdf_path)
+        else:
+            master = render_master(enhanced_img, width_ft=width_ft, dpi=dpi, encoding=encoding, timer=timer,
+                                   threads=threads)
+            with timer.stage("canvas_write"):
+                base_pdf = write_panel_pages(master, pages, width_ft=width_ft, dpi=dpi,
+                                             title=f"{design_name} variants", subject=subject)
+            doc = fitz.open(stream=base_pdf, filetype="pdf")
+
+        toc = []
+        with timer.stage("overlay_footer"):
+            for page, (brand, height_ft, substrate, bleed_mm) in zip(doc, variants):
+                profile = BRANDS[brand]
+                footer_pdf = get_optimized_footer(os.path.join(profile["footer_dir"], profile["footer_file"]),
+                                                  page.rect.width, dpi, footer_upscale, footer_sharpness)
+                if footer_pdf is None:
+                    raise FileNotFoundError(f"Footer of brand '{brand}' is not available")
+                stamp_footer(page, footer_pdf, profile, design_name, substrate, height_ft)
+                toc.append([1, f"{profile['name']} {substrate} {height_ft}ft {bleed_mm}mm", page.number + 1])
+
+            # Keep only the glyphs the output uses in the embedded fonts
+            doc.subset_fonts()
+            doc.set_toc(toc)
+            doc.set_metadata(dict(doc.metadata, title=f"{design_name} variants"))
+
+        with timer.stage("save"):
+            save_panel(doc, final_pdf_path, incremental=streaming, profile=save_profile)
+            doc.close()
+
+        logger.info("Combined PDF with %s variants saved: %s", len(variants), final_pdf_path)
+        return final_pdf_path
+
+    except Exception as e:
+        logger.exception("Rendering the combined PDF of %s failed", image_path)
+        timer.error = str(e)
+        final_pdf_path = None
+
+    finally:
+        if base_pdf_path is not None:
+            os.remove(base_pdf_path)
+        samples_metrics.emit({
+            "event": "combined", "pid": os.getpid(), "image": image_path, "design_name": design_name,
+            "brands": brands, "pages": len(variants), "dpi": dpi, "encoding": encoding, "streaming": streaming,
+            "save_profile": save_profile, "output": final_pdf_path,
+            "status": "failed" if timer.error else "ok", "error": timer.error, "stages": timer.stages,
+        })
+
+def stamp_footer(base_page, footer_pdf, profile, design_name, substrate, height_ft):
+    """
+    Stamp the brand footer and the design, material and panel height text onto a panel page.
+    profile is the BRANDS entry of the brand, footer_pdf its opened footer document.
+    The text font is embedded in full; subset it with Document.subset_fonts once every
+    page of the document is stamped.
+    """
+    import fitz
+
+    base_rect = base_page.rect
+
+    # Get dimensions
+    pdf_width = base_rect.width
+    pdf_height = base_rect.height
+
+    # Get the full material name based on substrate code
+    material_name = MATERIAL_NAMES.get(substrate, substrate)
+
+    # Panel height text with ft" format
+    panel_height_text = f"{height_ft}ft\""
+
+    footer_page = footer_pdf[0]
+    footer_rect = footer_page.rect
+
+    # Calculate appropriate footer scaling to maintain aspect ratio
+    footer_width = pdf_width
+    footer_height = footer_rect.height * (footer_width / footer_rect.width)
+
+    # Place footer at the very bottom of the page
+    y1 = pdf_height  # Bottom of the page
+    y0 = y1 - footer_height  # Top of the footer
+
+    # Insert the footer as a vector object, directly on the base page for every panel height
+    base_page.show_pdf_page(
+        fitz.Rect(0, y0, footer_width, y1),
+        footer_pdf,
+        0,
+        keep_proportion=True
+    )
+
+    # Add text information using PyMuPDF
+    text_color = (0, 0, 0)  # Black text
+
+    # Position text from the right edge as described by the brand profile
+    design_material_x = pdf_width - profile["design_x"]  # For design and material
+    height_x = pdf_width - profile["height_x"]  # For height
+
+    # Y positions - adjust based on footer layout
+    design_y = y0 + profile["design_y"]
+    material_y = y0 + profile["material_y"]
+    height_y = y0 + profile["height_y"]
+
+    # Use PyMuPDF to add text with the shared font object
+    text_font = get_font()  # Use Acumin Pro or fallback
+    font_size = profile["font_size"]
+
+    # Add text to the document without labels, the font is embedded once for the three lines
+    writer = fitz.TextWriter(base_page.rect, color=text_color)
+    writer.append((design_material_x, design_y), f"{design_name}", font=text_font, fontsize=font_size)
+    writer.append((design_material_x, material_y), f"{material_name}", font=text_font, fontsize=font_size)
+    writer.append((height_x, height_y), f"{panel_height_text}", font=text_font, fontsize=font_size)
+    writer.write_text(base_page)
+
+def save_panel(doc, output_path, incremental=False, profile=DEFAULT_SAVE_PROFILE):
+    """
+    Save a stamped panel document to output_path with a SAVE_PROFILES entry.
+    With incremental=True the document must have been opened from output_path, and the
+    changes are appended whatever the profile.
+    """
+    if incremental:
+        # Append the changes, the streamed image is not rewritten
+        doc.saveIncr()
+    else:
+        doc.save(output_path, **SAVE_PROFILES[profile])
+
+def overlay_footer(base_pdf, height_ft, substrate, double_blade=False, spacing_points=20, design_name=None, bleed_mm=2, footer_upscale=4, footer_sharpness=1.2,
+                   keep_base=False, brand="anthem", output_dir=".", incremental=False, timer=None, dpi=72,
+                   save_profile=None):
+    """
+    Overlay the brand footer onto the generated base PDF at the bottom.
+    The footer is stamped directly onto the base page for every panel height.
+    Allows setting upscale and sharpness for footer optimization.
+    Also adds text information about design name, material, and panel height.
+    Text is positioned on the opposite side without labels, at the offsets of the brand profile.
+    base_pdf is either the base PDF bytes from create_base_panel or the path of a base PDF.
+    The base PDF itself is never modified, so it can be reused for the other substrates
+    and brands; a base PDF file is removed afterwards unless keep_base is True.
+    With incremental=True the base PDF is copied to the output and the footer is appended
+    as an incremental update, so a large streamed panel is never loaded into memory.
+    save_profile selects the SAVE_PROFILES entry, by default the brand's save_profile or
+    DEFAULT_SAVE_PROFILE.
+    The footer raster is optimized with footer_upscale and footer_sharpness for the panel
+    resolution dpi, see get_optimized_footer.
+    The footer, overlay_footer and save stages are recorded on timer (a samples_metrics.StageTimer),
+    and the error is set on it when the output could not be written.
+    Returns the path of the final PDF, or None if it could not be written.
+    """
+    import fitz
+
+    timer = timer or samples_metrics.StageTimer()
+    try:
+        profile = BRANDS[brand]
+
+        # Use the footer file of the brand profile, loaded once per process
+        footer_pdf_path = os.path.join(profile["footer_dir"], profile["footer_file"])
+        footer_pdf = get_footer(footer_pdf_path)
+        if footer_pdf is None:
+            timer.error = f"Footer of brand '{brand}' is not available"
+            return
+
+        base_pdf_path = None if isinstance(base_pdf, (bytes, bytearray)) else base_pdf
+
+        # Use provided design_name or extract from file path if not provided
+        if design_name is None and base_pdf_path is not None:
+            design_name = os.path.splitext(os.path.basename(base_pdf_path))[0]
+            # Remove the temp_ prefix and format info for cleaner display
+            design_name = design_name.replace("temp_", "").split("_")[0]
+        elif design_name is None:
+            design_name = "design"
+
+        # Generate final filename based on pattern: [image_name]_[substrate]_[size]_[bleed]
+        final_pdf_path = os.path.join(output_dir, variant_filename(design_name, substrate, height_ft, bleed_mm))
+
+        # Replace an existing output instead of writing through it, it may be hard-linked into the output cache
+        if os.path.exists(final_pdf_path):
+            os.remove(final_pdf_path)
+
+        with timer.stage("overlay_footer"):
+            # Open base PDF
+            if incremental:
+                # Work on a copy of the base PDF and append the footer to it
+                if base_pdf_path is None:
+                    with open(final_pdf_path, "wb") as final_pdf:
+                        final_pdf.write(base_pdf)
+                else:
+                    shutil.copyfile(base_pdf_path, final_pdf_path)
+                base_doc = fitz.open(final_pdf_path)
+            elif base_pdf_path is None:
+                base_doc = fitz.open(stream=base_pdf, filetype="pdf")
+            else:
+                base_doc = fitz.open(base_pdf_path)
+
+        with timer.stage("footer"):
+            footer_pdf = get_optimized_footer(footer_pdf_path, base_doc[0].rect.width, dpi,
+                                              footer_upscale, footer_sharpness)
+
+        with timer.stage("overlay_footer"):
+            stamp_footer(base_doc[0], footer_pdf, profile, design_name, substrate, height_ft)
+
+            # Keep only the glyphs the output uses in the embedded fonts
+            base_doc.subset_fonts()
+
+            # Title the output after its substrate, the base panel is shared between variants
+            base_doc.set_metadata(dict(base_doc.metadata, title=f"{substrate} {height_ft}ft {bleed_mm}mm"))
+
+        with timer.stage("save"):
+            save_panel(base_doc, final_pdf_path, incremental=incremental,
+                       profile=save_profile or profile.get("save_profile", DEFAULT_SAVE_PROFILE))
+            base_doc.close()
+
+        logger.info("Final PDF with footer and text information saved: %s", final_pdf_path)
+
+        # Clean up temporary file unless it is shared with other variants
+        if base_pdf_path is not None and not keep_base:
+            os.remove(base_pdf_path)
+
+        return final_pdf_path
+
+    except Exception as e:
+        logger.exception("Error overlaying footer")
+        timer.error = str(e)
+
+def main(argv=None, brands=None):
+    """
+    Command line entry point: render the requested variants of one or more images.
+    Without an image on the command line, the image path is prompted for.
+    The brand scripts pass their own brand as brands; otherwise --brands selects them.
+    Returns the exit status, 1 if any output could not be written.
+    """
+    parser = argparse.ArgumentParser(description="Render large-format sample panels with the brand footers.")
+    parser.add_argument("images", nargs="*", help="Image files to render (prompted for when omitted)")
+    if brands is None:
+        parser.add_argument("--brands", nargs="+", choices=list(BRANDS), help="Brands to render (default: all)")
+    parser.add_argument("--heights", nargs="+", type=int, default=HEIGHTS,
+                        help=f"Panel heights in ft (default: {' '.join(map(str, HEIGHTS))})")
+    parser.add_argument("--substrates", nargs="+", choices=SUBSTRATES, default=SUBSTRATES,
+                        help="Substrates (default: all)")
+    parser.add_argument("--bleeds", nargs="+", type=int, choices=BLEED_MM_VALUES, default=BLEED_MM_VALUES,
+                        help="Bleeds in mm (default: all)")
+    parser.add_argument("--design-name", help="Design name in the footer (default: the image file name)")
+    parser.add_argument("--output-dir", default=".", help="Directory the PDFs are written to")
+    parser.add_argument("--tier", default="proof", choices=list(RESOLUTION_TIERS),
+                        help="Resolution tier of the panel image (default: proof)")
+    parser.add_argument("--dpi", type=int, help="Panel image resolution, overrides the tier")
+    parser.add_argument("--encoding", default="production", choices=sorted(ENCODING_PROFILES),
+                        help="Encoding profile of the panel image (default: production)")
+    parser.add_argument("--save-profile", choices=list(SAVE_PROFILES),
+                        help="Save profile of the PDFs (default: per brand, or delivery)")
+    parser.add_argument("--combined", action="store_true",
+                        help="Write all variants of an image as the pages of one PDF")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Threads for the band-parallel enhance and resize of each image (default: 1)")
+    args = parser.parse_args(argv)
+    if args.design_name and len(args.images) > 1:
+        parser.error("--design-name can only be used with a single image")
+    try:
+        check_stream_encoding(args.encoding, args.tier)
+    except ValueError as e:
+        parser.error(f"--tier {args.tier}: {e}")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    brands = brands or args.brands or list(BRANDS)
+    images = args.images or [input("Enter the full path to the image file: ").strip()]
+    expected = 1 if args.combined else len(brands) * len(args.heights) * len(args.substrates) * len(args.bleeds)
+
+    failed = 0
+    for image_path in images:
+        if not os.path.exists(image_path):
+            logger.error("The specified image file '%s' does not exist.", image_path)
+            failed += 1
+            continue
+
+        # Only the requested variants are rendered, each (height, bleed) base panel once
+        # with every brand's footer stamped onto it
+        written = create_variants(image_path, args.heights, args.substrates, args.bleeds,
+                                  design_name=args.design_name, brands=brands, output_dir=args.output_dir,
+                                  tier=args.tier, dpi=args.dpi, encoding=args.encoding,
+                                  save_profile=args.save_profile, combined=args.combined, threads=args.threads)
+        if len(written) < expected:
+            failed += 1
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import fitz
+import PIL
+from PIL import Image, ImageChops, ImageStat
+
+import samples_engine
+from samples_bench import synthetic_image, git_revision
+
+# Golden-output regression check of the render pipeline.
+# A synthetic design is rendered with every brand's footer and each output is compared
+# with the stored goldens: a low resolution render of the whole page, which catches tiling,
+# scale and layout changes, and a full resolution clip of the footer text, which catches
+# changes of the footer, the font and the text placement. Run it before and after a
+# performance change; --update records new goldens once a change is meant to alter the output.
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "goldens")
+
+# Synthetic design and the variants rendered per brand, covering every substrate, height and bleed
+GOLDEN_SIZE = (1800, 2160)
+GOLDEN_DESIGN = "golden"
+GOLDEN_VARIANTS = [("TRAD", 13, 2), ("P&S", 27, 3), ("PP", 13, 3)]
+
+# One more variant per brand for each render path beside the default in-memory proof render:
+# the streamed panel writer, the optimized footers of the standard tier, the band-parallel
+# enhance and resize, and the second page of a combined PDF, which reuses the tile of the first
+GOLDEN_MODES = {
+    "streamed": ("TRAD", 27, 3, {"dpi": 36, "streaming": True, "band_rows": 64}),
+    "standard": ("P&S", 13, 3, {"tier": "standard", "encoding": "proof"}),
+    "threads": ("PP", 27, 2, {"threads": 2}),
+    "combined": ("TRAD", 13, 3, {"combined": True}),
+}
+
+# Resolution of the page render and of the footer text clip
+PAGE_DPI = 4
+FOOTER_DPI = 200
+
+# Largest mean difference per channel, in levels, still accepted as unchanged
+PAGE_TOLERANCE = 1.0
+FOOTER_TOLERANCE = 0.5
+
+def footer_text_rect(page, profile):
+    """
+    Region of the footer text on a stamped page: the footer band from the left of the
+    design and material text to the right edge, see samples_engine.stamp_footer.
+    """
+    footer_pdf = samples_engine.get_footer(os.path.join(profile["footer_dir"], profile["footer_file"]))
+    footer_rect = footer_pdf[0].rect
+    footer_height = footer_rect.height * page.rect.width / footer_rect.width
+    left = page.rect.width - max(profile["design_x"], profile["height_x"]) - 10
+    return fitz.Rect(left, page.rect.height - footer_height, page.rect.width, page.rect.height)
+
+def render_checks(pdf_path, profile, page_number=0):
+    """
+    Render the page and footer text checks of a page of an output PDF, as {check name: RGB image}.
+    """
+    checks = {}
+    with fitz.open(pdf_path) as doc:
+        page = doc[page_number]
+        for name, dpi, clip in (("page", PAGE_DPI, None), ("footer", FOOTER_DPI, footer_text_rect(page, profile))):
+            pixmap = page.get_pixmap(dpi=dpi, clip=clip, alpha=False)
+            checks[name] = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    return checks
+
+def image_difference(actual, expected):
+    """
+    Mean and maximum absolute difference per channel, in levels, between two renders;
+    None if their sizes differ.
+    """
+    if actual.size != expected.size:
+        return None
+    difference = ImageChops.difference(actual, expected)
+    return sum(ImageStat.Stat(difference).mean) / 3, max(high for _, high in difference.getextrema())
+
+def golden_path(brand, substrate, height_ft, bleed_mm, check, golden_dir=GOLDEN_DIR, mode=None):
+    """
+    Path of one stored golden image; mode is the GOLDEN_MODES entry, None for GOLDEN_VARIANTS.
+    """
+    stem = os.path.splitext(samples_engine.variant_filename(GOLDEN_DESIGN, substrate, height_ft, bleed_mm))[0]
+    if mode:
+        stem = f"{stem}_{mode}"
+    return os.path.join(golden_dir, brand, f"{stem}_{check}.png")
+
+def run_golden(brands=None, update=False, golden_dir=GOLDEN_DIR, artifacts_dir=None):
+    """
+    Render GOLDEN_VARIANTS and GOLDEN_MODES of the synthetic design for every brand and compare
+    each check with its golden, or with update=True store the renders as the new goldens.
+    Footers are optimized into a temporary directory, so the optimization itself is checked.
+    With artifacts_dir, the renders and difference images of the failed checks are written there.
+    Returns one result dict per (brand, variant, mode, check) with its status (ok, changed,
+    missing or updated) and the measured difference.
+    """
+    brands = brands or list(samples_engine.BRANDS)
+    cases = [(None, substrate, height_ft, bleed_mm, {}) for substrate, height_ft, bleed_mm in GOLDEN_VARIANTS]
+    cases += [(mode, *case) for mode, case in GOLDEN_MODES.items()]
+    results = []
+    footer_cache_dir = samples_engine.FOOTER_CACHE_DIR
+    with tempfile.TemporaryDirectory() as temp_dir:
+        samples_engine.FOOTER_CACHE_DIR = os.path.join(temp_dir, "footers")
+        try:
+            image_path = synthetic_image(os.path.join(temp_dir, f"{GOLDEN_DESIGN}.png"), GOLDEN_SIZE)
+            for brand in brands:
+                results += check_brand(brand, cases, image_path, update, golden_dir, artifacts_dir,
+                                       os.path.join(temp_dir, brand))
+        finally:
+            samples_engine.close_footers()
+            samples_engine.FOOTER_CACHE_DIR = footer_cache_dir
+
+    if update:
+        # Record what the goldens were rendered with, to tell code changes from environment changes
+        for brand in brands:
+            with open(os.path.join(golden_dir, brand, "golden.json"), "w", encoding="utf-8") as manifest:
+                json.dump({"revision": git_revision(), "font": samples_engine.get_font().name,
+                           "pymupdf": fitz.VersionBind, "pillow": PIL.__version__,
+                           "variants": GOLDEN_VARIANTS, "modes": GOLDEN_MODES,
+                           "page_dpi": PAGE_DPI, "footer_dpi": FOOTER_DPI},
+                          manifest, indent=2)
+    return results
+
+def check_brand(brand, cases, image_path, update, golden_dir, artifacts_dir, output_dir):
+    """
+    Render the (mode, substrate, height, bleed, render options) cases of one brand and compare
+    or update their checks, see run_golden.
+    """
+    profile = samples_engine.BRANDS[brand]
+    results = []
+    for mode, substrate, height_ft, bleed_mm, options in cases:
+        bleed_mm_values = [bleed_mm]
+        if options.get("combined"):
+            # The checked variant is the last page, after a page of the other bleed
+            bleed_mm_values = [other for other in samples_engine.BLEED_MM_VALUES if other != bleed_mm] + [bleed_mm]
+        outputs = samples_engine.create_variants(image_path, [height_ft], [substrate], bleed_mm_values,
+                                                 design_name=GOLDEN_DESIGN, brands=[brand],
+                                                 output_dir=os.path.join(output_dir, mode or "default"), **options)
+        if not outputs:
+            raise RuntimeError(f"{brand} {substrate} {height_ft}ft {bleed_mm}mm {mode or 'default'} could not be rendered")
+
+        for check, actual in render_checks(outputs[0], profile, page_number=-1).items():
+            path = golden_path(brand, substrate, height_ft, bleed_mm, check, golden_dir, mode)
+            result = {"brand": brand, "substrate": substrate, "height_ft": height_ft,
+                      "bleed_mm": bleed_mm, "mode": mode, "check": check, "golden": path,
+                      "mean_diff": None, "max_diff": None}
+            results.append(result)
+
+            if update:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                actual.save(path, optimize=True)
+                result["status"] = "updated"
+                continue
+            if not os.path.exists(path):
+                result["status"] = "missing"
+                continue
+
+            with Image.open(path) as golden:
+                expected = golden.convert("RGB")
+            difference = image_difference(actual, expected)
+            tolerance = PAGE_TOLERANCE if check == "page" else FOOTER_TOLERANCE
+            if difference is not None:
+                result["mean_diff"], result["max_diff"] = round(difference[0], 4), difference[1]
+            result["status"] = "ok" if difference is not None and difference[0] <= tolerance else "changed"
+
+            if result["status"] == "changed" and artifacts_dir:
+                os.makedirs(artifacts_dir, exist_ok=True)
+                stem = os.path.join(artifacts_dir, f"{brand}_{os.path.basename(path)[:-4]}")
+                actual.save(f"{stem}_actual.png")
+                if difference is not None:
+                    ImageChops.difference(actual, expected).save(f"{stem}_diff.png")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare renders of a synthetic design with the stored goldens.")
+    parser.add_argument("--brands", nargs="+", choices=list(samples_engine.BRANDS),
+                        help="Brands to check (default: all)")
+    parser.add_argument("--update", action="store_true",
+                        help="Store the current renders as the new goldens instead of comparing")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR, help="Directory of the goldens, one sub-directory per brand")
+    parser.add_argument("--artifacts-dir", help="Write the renders and difference images of changed checks here")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_golden(brands=args.brands, update=args.update, golden_dir=args.golden_dir,
+                         artifacts_dir=args.artifacts_dir)
+
+    failed = 0
+    for result in results:
+        if result["status"] in ("ok", "updated"):
+            continue
+        failed += 1
+        difference = f", mean {result['mean_diff']} max {result['max_diff']}" if result["mean_diff"] is not None \
+            else ""
+        mode = f" {result['mode']}" if result["mode"] else ""
+        print(f"[❌] {result['brand']} {result['substrate']} {result['height_ft']}ft {result['bleed_mm']}mm{mode} "
+              f"{result['check']}: {result['status']}{difference}")
+
+    action = "Updated" if args.update else "Checked"
+    print(f"{action} {len(results)} golden(s) in {time.perf_counter() - start:.1f}s, {failed} changed or missing")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
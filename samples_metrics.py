@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is then not reported
+    resource = None
+
+# Per-stage instrumentation of the render pipeline.
+# The engine times every stage of a variant with a StageTimer and emits one record per
+# variant; subscribers registered with add_hook receive each record as a dict.
+# With SAMPLES_METRICS=<path> the records are appended to that file as JSON lines, and
+# with SAMPLES_TRACEMALLOC=1 the peak Python heap of every stage is recorded as well.
+# With SAMPLES_STAGE_RSS=1 the peak RSS is measured per stage on Linux, see StageTimer.
+
+logger = logging.getLogger("samples.metrics")
+
+_HOOKS = []
+
+# Reset the RSS high-water mark of the process at every stage, see StageTimer
+STAGE_RSS = os.environ.get("SAMPLES_STAGE_RSS") == "1"
+
+# Peak RSS in kB seen so far by each open stage, kept across the resets of nested stages
+_open_peaks = []
+_peaks_lock = threading.Lock()
+
+def peak_rss_mb():
+    """
+    High-water mark of the process resident set size since it started in MB, or None where
+    it is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+def read_hwm_kb():
+    """
+    Resident set size high-water mark (VmHWM) of the process in kB, or None outside Linux.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def reset_hwm():
+    """
+    Reset VmHWM to the current resident set size. Returns False where it cannot be reset.
+    This is process-wide: it also lowers the ru_maxrss that getrusage reports afterwards.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+class StageTimer:
+    """
+    Wall time, CPU time and peak memory of named pipeline stages.
+    Each stage records wall and cpu seconds, the process-wide RSS high-water mark at the end
+    of the stage as process_peak_rss_mb and, while tracemalloc is tracing, the peak traced
+    Python allocations during the stage.
+    With STAGE_RSS (SAMPLES_STAGE_RSS=1) on Linux, the high-water mark is reset when a stage
+    starts and peak_rss_mb, the peak during the stage, is recorded instead. The reset is
+    process-wide, so the process's own ru_maxrss no longer reports its lifetime peak.
+    A stage entered several times accumulates its times and keeps its highest peaks.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        # Message of the error that stopped the timed work, if any
+        self.error = None
+
+    @contextmanager
+    def stage(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        stage_peak = None
+        if STAGE_RSS:
+            with _peaks_lock:
+                # The enclosing stages keep the peak reached so far before it is reset
+                hwm = read_hwm_kb()
+                for open_peak in _open_peaks:
+                    open_peak[0] = max(open_peak[0], hwm or 0)
+                if hwm is not None and reset_hwm():
+                    stage_peak = [0]
+                    _open_peaks.append(stage_peak)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            record = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            record["wall"] = round(record["wall"] + time.perf_counter() - wall_start, 4)
+            record["cpu"] = round(record["cpu"] + time.process_time() - cpu_start, 4)
+            if stage_peak is not None:
+                with _peaks_lock:
+                    _open_peaks[:] = [open_peak for open_peak in _open_peaks if open_peak is not stage_peak]
+                    peak_mb = round(max(stage_peak[0], read_hwm_kb() or 0) / 1024, 1)
+                record["peak_rss_mb"] = max(record.get("peak_rss_mb", 0), peak_mb)
+            else:
+                record["process_peak_rss_mb"] = peak_rss_mb()
+            if tracing:
+                traced_peak = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+                record["peak_traced_mb"] = max(record.get("peak_traced_mb", 0), traced_peak)
+
+def add_hook(hook):
+    """
+    Subscribe hook(record) to every emitted record. Returns hook, so it can be used as a decorator.
+    """
+    _HOOKS.append(hook)
+    return hook
+
+def remove_hook(hook):
+    """
+    Unsubscribe a hook added with add_hook.
+    """
+    if hook in _HOOKS:
+        _HOOKS.remove(hook)
+
+def emit(record):
+    """
+    Pass a metrics record to every hook. A failing hook is logged and never fails the render.
+    """
+    logger.debug(json.dumps(record))
+    for hook in list(_HOOKS):
+        try:
+            hook(record)
+        except Exception:
+            logger.exception("Metrics hook %r failed", hook)
+
+class JsonLinesWriter:
+    """
+    Hook appending every record to a file as one JSON line.
+    Each record is written with a single append, so several worker processes can share the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as output:
+            output.write(line)
+
+    def __repr__(self):
+        return f"JsonLinesWriter({self.path!r})"
+
+if os.environ.get("SAMPLES_METRICS"):
+    add_hook(JsonLinesWriter(os.environ["SAMPLES_METRICS"]))
+
+if os.environ.get("SAMPLES_TRACEMALLOC") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
@@ -0,0 +1,93 @@
+import argparse
+import json
+
+from PIL import Image
+
+import samples_engine
+from samples_batch import load_jobs
+
+# Preflight scan of a design library.
+# Only the image headers are read (PIL opens images lazily), no pixels are decoded,
+# so thousands of designs are checked in seconds before committing to a render.
+
+def preflight_image(image_path, heights=None, bleed_mm_values=None, dpis=None, width_ft=2):
+    """
+    Report the upscaling and raster memory of every (height, bleed, dpi) variant of one image.
+    Every bleed is cropped from the same master tile, scaled to fill the panel width extended
+    by samples_engine.MASTER_BLEED_MM, so the upscale ratio is the master width over the source
+    width; raster_bytes is the size of the resized RGB master.
+    """
+    heights = heights or samples_engine.HEIGHTS
+    bleed_mm_values = bleed_mm_values or samples_engine.BLEED_MM_VALUES
+    dpis = dpis or sorted({tier["dpi"] for tier in samples_engine.RESOLUTION_TIERS.values()})
+
+    report = {"image": image_path}
+    try:
+        with Image.open(image_path) as img:
+            size, mode = img.size, img.mode
+    except Exception as e:
+        report["error"] = str(e)
+        return report
+
+    report.update(width=size[0], height=size[1], mode=mode, source_bytes=size[0] * size[1] * 3, variants=[])
+    for height_ft in heights:
+        for bleed_mm in bleed_mm_values:
+            for dpi in dpis:
+                new_width, new_height = samples_engine.tile_pixel_size(size, width_ft,
+                                                                       samples_engine.MASTER_BLEED_MM, dpi)
+                upscale = new_width / size[0]
+                report["variants"].append({
+                    "height_ft": height_ft,
+                    "bleed_mm": bleed_mm,
+                    "dpi": dpi,
+                    "tile_width": new_width,
+                    "tile_height": new_height,
+                    "tile_count": int(height_ft * 12 * 72 // (new_height * 72 / dpi)) + 1,
+                    "upscale": round(upscale, 3),
+                    "needs_upscale": upscale > 1,
+                    "raster_bytes": new_width * new_height * 3,
+                })
+    return report
+
+def preflight(source, **options):
+    """
+    Preflight every image of a directory or CSV/JSON manifest, see preflight_image.
+    """
+    return [preflight_image(job["image"], **options) for job in load_jobs(source)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Header-only preflight scan of a design library.")
+    parser.add_argument("source", help="Directory of images, or a .csv/.json manifest")
+    parser.add_argument("--heights", nargs="+", type=int, help="Panel heights in ft (default: all)")
+    parser.add_argument("--bleeds", nargs="+", type=int, help="Bleeds in mm (default: all)")
+    parser.add_argument("--dpis", nargs="+", type=int, help="Resolutions (default: every resolution tier)")
+    parser.add_argument("--json", help="Write the full report to this JSON file")
+    args = parser.parse_args(argv)
+
+    reports = preflight(args.source, heights=args.heights, bleed_mm_values=args.bleeds, dpis=args.dpis)
+
+    flagged = 0
+    for report in reports:
+        if "error" in report:
+            flagged += 1
+            print(f"[❌] {report['image']}: {report['error']}")
+            continue
+        upscaled = [variant for variant in report["variants"] if variant["needs_upscale"]]
+        if upscaled:
+            flagged += 1
+        print(f"{'[⚠️]' if upscaled else '[✅]'} {report['image']} ({report['width']}x{report['height']})")
+        for variant in upscaled:
+            print(f"    {variant['height_ft']}ft {variant['bleed_mm']}mm @ {variant['dpi']} DPI: "
+                  f"upscale x{variant['upscale']}, tile {variant['tile_width']}x{variant['tile_height']}, "
+                  f"{variant['raster_bytes'] / 1024 ** 2:.0f} MB raster")
+
+    print(f"Scanned {len(reports)} design(s), {flagged} need upscaling or could not be read")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(reports, output, indent=2)
+
+    return 1 if flagged else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,251 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socketserver
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import samples_engine
+from samples_batch import render_job
+
+# Long-lived local render service.
+# The libraries, the font and the brand footers are loaded once per worker process when
+# the service starts, so a render request only pays for the render itself.
+#
+#   POST /render  {"image": "...", "design_name": "...", "brands": [...], "heights": [...],
+#                  "substrates": [...], "bleeds": [...], "output_dir": "...", "tier": "...",
+#                  "encoding": "...", "save_profile": "...", "combined": false, "threads": 1}
+#   GET  /health
+#
+# Every field but "image" is optional. The response is the render_job result, with the
+# paths of the written PDFs in "outputs".
+
+logger = logging.getLogger("samples.service")
+
+# Request fields passed on to samples_engine.create_variants
+RENDER_OPTIONS = ("tier", "encoding", "save_profile", "dpi", "streaming", "band_rows", "enhancement", "combined",
+                  "threads")
+
+# Allowed values of the named render options
+CHOICE_OPTIONS = {"tier": samples_engine.RESOLUTION_TIERS, "encoding": samples_engine.ENCODING_PROFILES,
+                  "save_profile": samples_engine.SAVE_PROFILES}
+POSITIVE_INT_OPTIONS = ("dpi", "band_rows", "threads")
+BOOL_OPTIONS = ("streaming", "combined")
+
+def request_list(request, name, label, allowed):
+    """
+    Return the list field name of a request, all of allowed when it is missing or empty.
+    Raises ValueError if it is not a list or has values outside allowed, or of another type:
+    13.0 equals the height 13 but would be written as 13.0 in the file names.
+    """
+    allowed = list(allowed)
+    values = request.get(name)
+    if not values:
+        return allowed
+    if not isinstance(values, list):
+        raise ValueError(f"'{name}' must be a list")
+    unknown = [str(value) for value in values
+               if type(value) not in {type(item) for item in allowed} or value not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {label}(s): {', '.join(unknown)}")
+    return values
+
+def check_render_option(name, value):
+    """
+    Raise ValueError if value is not valid for the render option name.
+    """
+    if name in CHOICE_OPTIONS:
+        if not isinstance(value, str) or value not in CHOICE_OPTIONS[name]:
+            raise ValueError(f"Unknown {name} {value!r}, expected one of: {', '.join(CHOICE_OPTIONS[name])}")
+    elif name in POSITIVE_INT_OPTIONS:
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"'{name}' must be a positive integer")
+    elif name in BOOL_OPTIONS:
+        if not isinstance(value, bool):
+            raise ValueError(f"'{name}' must be true or false")
+    elif name == "enhancement":
+        if not isinstance(value, dict):
+            raise ValueError("'enhancement' must be an object")
+        for factor, amount in value.items():
+            if factor not in samples_engine.DEFAULT_ENHANCEMENT:
+                raise ValueError(f"Unknown enhancement factor {factor!r}, expected one of: "
+                                 f"{', '.join(samples_engine.DEFAULT_ENHANCEMENT)}")
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount < 0:
+                raise ValueError(f"Enhancement factor '{factor}' must be a non-negative number")
+
+def check_design_name(design_name):
+    """
+    Raise ValueError unless design_name is a non-empty string that can prefix a file name.
+    """
+    if not isinstance(design_name, str) or not design_name.strip():
+        raise ValueError("'design_name' must be a non-empty string")
+    if any(separator in design_name for separator in ("/", "\\", os.sep)) or design_name in (".", ".."):
+        raise ValueError("'design_name' must not contain path separators")
+
+def warm_worker():
+    """
+    Worker initializer: load reportlab and the footer font, then open every brand footer
+    and build its optimized footers for each resolution tier and bleed, so the first
+    request of a worker does not pay for them.
+    """
+    # samples_engine imports them on first use only
+    import reportlab.pdfbase.pdfdoc
+    import reportlab.pdfgen.canvas
+
+    samples_engine.get_font()
+    for profile in samples_engine.BRANDS.values():
+        footer_pdf_path = os.path.join(profile["footer_dir"], profile["footer_file"])
+        for tier in samples_engine.RESOLUTION_TIERS.values():
+            for bleed_mm in samples_engine.BLEED_MM_VALUES:
+                samples_engine.get_optimized_footer(footer_pdf_path,
+                                                    samples_engine.extended_tile_width_points(2, bleed_mm),
+                                                    tier["dpi"])
+
+class RenderService:
+    """
+    Worker pool rendering requests with samples_batch.render_job.
+    """
+
+    def __init__(self, workers=None, output_dir="."):
+        self.workers = workers or os.cpu_count() or 1
+        self.output_dir = output_dir
+        # Build the optimized footers once before the workers start, they only open them from disk
+        warm_worker()
+        # Every worker is started and warmed up front
+        self.pool = multiprocessing.Pool(self.workers, initializer=warm_worker)
+
+    def render(self, request):
+        """
+        Validate a render request and run it on the pool. Returns the render_job result.
+        Raises ValueError for an invalid request.
+        """
+        image = request.get("image")
+        if not image:
+            raise ValueError("'image' is required")
+        if not isinstance(image, str):
+            raise ValueError("'image' must be a path")
+        if not os.path.exists(image):
+            raise ValueError(f"The specified image file '{image}' does not exist.")
+        brands = request_list(request, "brands", "brand", samples_engine.BRANDS)
+        heights = request_list(request, "heights", "height", samples_engine.HEIGHTS)
+        substrates = request_list(request, "substrates", "substrate", samples_engine.SUBSTRATES)
+        bleeds = request_list(request, "bleeds", "bleed", samples_engine.BLEED_MM_VALUES)
+        render_options = {name: request[name] for name in RENDER_OPTIONS if request.get(name) is not None}
+        for name, value in render_options.items():
+            check_render_option(name, value)
+        samples_engine.check_stream_encoding(render_options.get("encoding", "production"),
+                                             render_options.get("tier", "proof"), render_options.get("streaming"))
+        if request.get("design_name") is not None:
+            check_design_name(request["design_name"])
+        if request.get("output_dir") is not None and not isinstance(request["output_dir"], str):
+            raise ValueError("'output_dir' must be a path")
+
+        job = {"image": os.path.abspath(image), "design_name": request.get("design_name"),
+               "save_profile": request.get("save_profile")}
+        return self.pool.apply(render_job, (job, brands, heights, substrates, bleeds,
+                                            request.get("output_dir") or self.output_dir, render_options))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON front end of the RenderService of the server.
+    """
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok", "workers": self.server.service.workers})
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/render":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("The request body must be a JSON object")
+            result = self.server.service.render(request)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception("Render request failed")
+            self.send_json(500, {"error": str(e)})
+            return
+        self.send_json(200 if result["status"] == "ok" else 500, result)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """
+        HTTP server on a Unix socket, one thread per connection.
+        """
+        daemon_threads = True
+
+def serve(service, host="127.0.0.1", port=8765, socket_path=None):
+    """
+    Serve render requests on host:port, or on a Unix socket, until interrupted.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, RenderRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.service = service
+    logger.info("Render service ready on %s with %s workers",
+                socket_path or f"http://{host}:{server.server_address[1]}", service.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local render service keeping libraries, fonts and footers warm.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--output-dir", default=".", help="Default directory the PDFs are written to")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("samples").setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    # Stop cleanly when the service manager terminates the daemon
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    service = RenderService(args.workers, args.output_dir)
+    try:
+        serve(service, args.host, args.port, args.socket)
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()